@@ -1,5 +1,5 @@
 from .modpakyml import parse_modpak_yml, ModConf
-from .utils import as_props, as_table, coalesce, print, Styles, Syms, syntax, syntax_diff, ensure_empty_dir, cpfile, rule
+from .utils import as_props, as_table, coalesce, print, Styles, Syms, syntax, syntax_diff, ensure_empty_dir, cpfile, fastcopy, linkfile, rule
 from .backend import *
 from functools import wraps
 from itertools import chain
@@ -89,7 +89,7 @@ async def build(ctx: ModpakCtx, build_type: str):
 async def search(query: list[str], loader: Loader, mcver: McVerMatch, type: Type, limit: int=100, category: str|None = None, category_not: str|None = None, sort: str|None = None):
     async with Modrinth() as modrinth:
         if category_not:
-            category_not = category_not.split(',')
+            category_not = frozenset(category_not.split(','))
             cats = await modrinth.get_categories(type)
             cats = [c for c in cats if c not in category_not]
             category = ','.join(cats)
@@ -243,11 +243,11 @@ async def get_default_configs(ctx, type, instance: str|None = None, dry: bool =
             print(Text.styled(m.name, Styles.yellow_bold), ' - ', t)
             for p in c:
                 print('  ', Text.styled(p.glob + ':', t.style))
+                src_text = (src_path, Styles.green_italic)
+                dst_text = (dst_path + '/', Styles.orange_italic)
                 for match in p.match_paths(src_path):
-                    globbed = Text.styled(match, Styles.cyan_italic)
-                    print('    ', Text.styled(src_path, Styles.green_italic) + globbed,
-                          Syms.arrow,
-                          Text.styled(dst_path + '/', Styles.orange_italic) + globbed)
+                    globbed = (match, Styles.cyan_italic)
+                    print('    ', Text.assemble(src_text, globbed), Syms.arrow, Text.assemble(dst_text, globbed))
                     if not dry:
                         cpfile(os.path.join(src_path, match), os.path.join(dst_path, match))
 
@@ -293,12 +293,14 @@ async def install(ctx, build_type: str, instance: str|None = None, no_mods: bool
     # datapacks_path = 
     # resourcepacks_path = inst.get_dir(InstDir.RESOURCEPACKS)
 
-    def copy_dir(src, dst):
+    # Mods are never written by the game, so they can share inodes with the build.
+    # Configs are, so they get copies.
+    def copy_dir(src, dst, link: bool = False):
         print(f'Emptying/creating directory {dst}')
         if not dry: ensure_empty_dir(dst)
-        print(f'Copying {src} to {dst}')
-        if not dry: copytree(src, dst, dirs_exist_ok=True)
-    if not no_mods: copy_dir(build_dirs.mods, inst.get_dir(InstDir.MODS))
+        print(f'{"Linking" if link else "Copying"} {src} to {dst}')
+        if not dry: copytree(src, dst, dirs_exist_ok=True, copy_function=linkfile if link else fastcopy)
+    if not no_mods: copy_dir(build_dirs.mods, inst.get_dir(InstDir.MODS), link=True)
     if not no_conf:
         copy_dir(build_dirs.config, inst.get_dir(InstDir.CONFIG))
         if defaultconfig := inst.get_dir(InstDir.DEFAULTCONFIG):
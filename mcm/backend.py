@@ -63,15 +63,19 @@ class SearchResult:
     type: Type
     url: str
 
+    cached_row: tuple|None = field(default=None, init=False, repr=False, compare=False)
+
     def to_row(self, i: int) -> tuple:
-        row = [Text.styled(self.title, Styles.cyan_bold)]
-        if self.short_desc: row.append(Text.styled(self.short_desc, Styles.bold))
-        row.append(Text.styled(f'<{self.url}>', Styles.yellow_italic))
-        return (Text.styled(f'#{i}', Styles.yellow_bold) + Text.styled(f' - {self.name}', Styles.bold),
-                Group(Text(f'{self.downloads} DLs', Styles.yellow_dim_italic),
-                      Text(f'Upd.: {self.date_updated.strftime("%d.%m.%y %H:%M")}', Styles.green_italic),
-                      self.type),
-                Group(*row))
+        if self.cached_row is None:
+            row = [Text.styled(self.title, Styles.cyan_bold)]
+            if self.short_desc: row.append(Text.styled(self.short_desc, Styles.bold))
+            row.append(Text.styled(f'<{self.url}>', Styles.yellow_italic))
+            self.cached_row = (Group(Text(f'{self.downloads} DLs', Styles.yellow_dim_italic),
+                                     Text(f'Upd.: {self.date_updated.strftime("%d.%m.%y %H:%M")}', Styles.green_italic),
+                                     self.type),
+                               Group(*row))
+        return (Text.assemble((f'#{i}', Styles.yellow_bold), (f' - {self.name}', Styles.bold)),
+                *self.cached_row)
 
 @dataclass(slots=True, match_args=False)
 class SearchResults:
@@ -80,6 +84,6 @@ class SearchResults:
 
     def __rich__(self) -> Table:
         t = Table.grid(padding=1)
-        for i,r in reversed(list(enumerate(self.results, 1))): t.add_row(*r.to_row(i))
+        for i in range(len(self.results), 0, -1): t.add_row(*self.results[i - 1].to_row(i))
         return Group(t, Text.styled(str(self.total), Styles.cyan_bold_italic) + Text.styled(' results total'))
 
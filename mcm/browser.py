@@ -1,11 +1,13 @@
 from dataclasses import dataclass, field
+from collections import deque
 from enum import Enum
-from itertools import chain
-from functools import partial
+from itertools import chain, islice
+from functools import lru_cache, partial
 from typing import Any
 from selenium import webdriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
 import asyncio
 import os.path
 from os import access, R_OK
@@ -30,12 +32,13 @@ class PathSelector:
         return list(map(partial(Element, browser), chain.from_iterable(o.find_elements(self.type.value, self.path) for o in other)))
 
 def yield_selectors(it):
-    match it:
-        case PathSelector(): yield it
-        case str(): yield PathSelector(SelType.CSS, it)
-        case list()|tuple():
-            for i in it: yield from yield_selectors(it)
-        case _: raise ValueError(it)
+    stack = deque((it, ))
+    while stack:
+        match stack.popleft():
+            case PathSelector() as sel: yield sel
+            case str() as sel: yield PathSelector(SelType.CSS, sel)
+            case list()|tuple() as sels: stack.extendleft(reversed(sels))
+            case sel: raise ValueError(sel)
 
 def to_sel(sel: PathSelector|str):
     if sel.__class__ is PathSelector: return sel
@@ -44,7 +47,7 @@ def to_sel(sel: PathSelector|str):
 class Path(list):
     __slots__ = ()
     def __init__(self, *args):
-        list.__init__(self, yield_selectors(it))
+        list.__init__(self, yield_selectors(args))
     def __add__(self, other):
         if other.__class__ is Path:
             return Path(self[:-1], self[-1] + other[0], other[1:])
@@ -88,7 +91,7 @@ class Element:
         self.scroll_to_middle()
         self.inner.click()
 
-    def children(self): return Elements(Element(self.browser, e) for e in self.inner.get_property('children'))
+    def children(self): return ElementIter(Element(self.browser, e) for e in self.inner.get_property('children'))
 
     def parent(self): return Element(self.browser, self.inner.parent)
 
@@ -111,12 +114,11 @@ class Elements(list):
         if other.__class__ is not Elements: return NotImplemented
         return Elements(list.__add__(self, other))
 
-    def children(self): return Elements(chain.from_iterable(map(Element.children, self)))
-    def parent(self): return Elements(map(Element.parent, self))
-    def find(self, sel: SelIn): return Elements(chain.from_iterable(e.find(sel) for e in self))
-    def exists(self, sel: SelIn) -> bool:
-        return bool(self.find(sel))
-    def filter(self, sel: SelIn): return Elements(filter(lambda x: x.matches(sel), self))
+    def children(self): return ElementIter(self).children()
+    def parent(self): return ElementIter(self).parent()
+    def find(self, sel: SelIn): return ElementIter(self).find(sel)
+    def exists(self, sel: SelIn) -> bool: return ElementIter(self).exists(sel)
+    def filter(self, sel: SelIn): return ElementIter(self).filter(sel)
 
     def one(self):
         if len(self) != 1: raise ValueError(f'Expected single element')
@@ -126,6 +128,64 @@ class Elements(list):
         if len(self) > 1: raise ValueError(f'Expected zero or one elements')
         return self[0] if self else None
 
+# Single-pass element pipeline - only materialized into Elements when indexed or measured.
+class ElementIter:
+    __slots__ = ('it', 'elements')
+
+    def __init__(self, it):
+        self.it = it
+        self.elements = None
+
+    def collect(self) -> Elements:
+        if self.elements is None:
+            self.elements = Elements(self.it)
+            self.it = None
+        return self.elements
+
+    def _source(self): return self.it if self.elements is None else self.elements
+
+    def children(self): return ElementIter(chain.from_iterable(map(Element.children, self._source())))
+    def parent(self): return ElementIter(map(Element.parent, self._source()))
+    def find(self, sel: SelIn): return ElementIter(chain.from_iterable(e.find(sel) for e in self._source()))
+    def exists(self, sel: SelIn) -> bool:
+        return next(iter(self.find(sel)._source()), None) is not None
+    def filter(self, sel: SelIn): return ElementIter(filter(lambda x: x.matches(sel), self._source()))
+
+    def one(self):
+        if self.elements is not None: return self.elements.one()
+        first, second = islice(chain(self.it, (None, None)), 2)
+        if first is None or second is not None: raise ValueError(f'Expected single element')
+        return first
+
+    def maybe_one(self):
+        if self.elements is not None: return self.elements.maybe_one()
+        first, second = islice(chain(self.it, (None, None)), 2)
+        if second is not None: raise ValueError(f'Expected zero or one elements')
+        return first
+
+    def __iter__(self): return iter(self.collect())
+    def __len__(self): return len(self.collect())
+    def __getitem__(self, i): return self.collect()[i]
+    def __bool__(self): return bool(self.collect())
+
+@lru_cache(maxsize=2048)
+def join_url(base_url: str, path: str):
+    if path.startswith('http://') or path.startswith('https://'): return path
+    return base_url + path.lstrip('/')
+
+# Resolves once the selector matches, or with false after the timeout.
+WAIT_SCRIPT = '''
+const [sel, timeout, done] = arguments;
+if (document.querySelector(sel)) return done(true);
+const observer = new MutationObserver(() => {
+  if (!document.querySelector(sel)) return;
+  observer.disconnect();
+  done(true);
+});
+observer.observe(document, {subtree: true, childList: true, attributes: true});
+setTimeout(() => { observer.disconnect(); done(false); }, timeout);
+'''
+
 __all__ = ('Browser')
 @dataclass(slots=True)
 class Browser:
@@ -138,11 +198,11 @@ class Browser:
     def browser(self):
         if not self._browser:
             self.temp_dir = mkdtemp()
-            profile = webdriver.FirefoxProfile()
-            profile.set_preference("browser.download.folderList", 2)
-            profile.set_preference("browser.download.dir", self.temp_dir)
-            profile.set_preference("browser.contentblocking.category", 'strict')
-            self._browser = webdriver.Firefox(firefox_profile=profile)
+            options = webdriver.FirefoxOptions()
+            options.set_preference("browser.download.folderList", 2)
+            options.set_preference("browser.download.dir", self.temp_dir)
+            options.set_preference("browser.contentblocking.category", 'strict')
+            self._browser = webdriver.Firefox(options=options)
         return self._browser
 
     def __post_init__(self):
@@ -158,14 +218,14 @@ class Browser:
 
     @property
     def title(self): return self.browser.title
+    @property
+    def url(self) -> str: return self.browser.current_url
 
     def meta(self, name: str):
         el = self.find(f"meta[name='{name}']").maybe_one()
         return el and el.attr('content')
 
-    def get_url(self, path: str):
-        if path.startswith('http://') or path.startswith('https://'): return path
-        return self.base_url + path.lstrip('/')
+    def get_url(self, path: str): return join_url(self.base_url, path)
     def maybe_get_url(self, path: str|None):
         if not path: return None
         return self.get_url(path)
@@ -184,12 +244,30 @@ class Browser:
         self.current_url = url
 
     async def maybe_wait(self, sel: SelIn, timeout: int = 5000) -> Elements:
+        if result := self.find(sel): return result
+        match to_path_or_sel(sel):
+            case PathSelector(SelType.CSS, css):
+                try:
+                    await asyncio.to_thread(self.browser.execute_async_script, WAIT_SCRIPT, css, timeout)
+                except WebDriverException: pass
+                return self.find(sel)
         while not (result := self.find(sel)):
             await asyncio.sleep(0.1)
             timeout -= 100
             if timeout <= 0: return Elements()
         return result
 
+    async def wait_until(self, predicate, timeout: int|None = 5000) -> bool:
+        while not predicate():
+            if timeout is not None:
+                if timeout <= 0: return False
+                timeout -= 100
+            await asyncio.sleep(0.1)
+        return True
+
+    async def wait_gone(self, sel: SelIn, timeout: int = 5000) -> bool:
+        return await self.wait_until(lambda: not self.exists(sel), timeout)
+
     async def wait(self, sel: SelIn, timeout: int = 5000) -> Elements:
         result = await self.maybe_wait(sel, timeout)
         if not result: raise ValueError(f'Selector {sel} did not appear')
@@ -198,6 +276,8 @@ class Browser:
     def find(self, sel: SelIn) -> Elements:
         return Elements(to_path_or_sel(sel)(self, self.browser))
 
+    def execute(self, script: str, *args): return self.browser.execute_script(script, *args)
+
     def exists(self, sel: SelIn) -> bool:
         return bool(self.find(sel))
 
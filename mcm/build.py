@@ -1,14 +1,28 @@
 from .infomanager import ModInfoManager
 from .common import Type
-from .utils import ensure_empty_dir
+from .utils import ensure_empty_dir, fastcopy
 from .modpakyml import TargetDirs, ModpakYml, BuildType, ModConf
-from .modconfs import ModConfType
+from .modconfs import ModConfType, apply_conf_files
 from .resolve import ResolveResult
-from shutil import copyfile
-from glob import iglob
-from zipfile import ZipFile
+from itertools import chain
+from zipfile import ZipFile, ZIP_STORED
+import asyncio
 import os.path
 
+MAX_CONCURRENT_COPIES = 8
+
+# Packs are stored uncompressed, as the game reads both. Hidden files are
+# skipped and symlinked directories followed, like glob('**') would.
+def zip_dir(src: str, to: str):
+    src = os.path.join(src, '')
+    with ZipFile(to, 'w', ZIP_STORED) as f:
+        for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            dirpath = os.path.join(dirpath, '')
+            arcdir = dirpath[len(src):]
+            for name in chain(dirnames, filenames):
+                if not name.startswith('.'): f.write(dirpath + name, arcname=arcdir + name)
+
 async def build(manager: ModInfoManager, modpak: ModpakYml, build_type: BuildType|str,
           resolutions: ResolveResult, source_dir: str, target_dir: str):
     build_type = modpak.get_build_type(build_type)
@@ -23,29 +37,33 @@ async def build(manager: ModInfoManager, modpak: ModpakYml, build_type: BuildTyp
     ensure_empty_dir(target_dirs.get_dir(Type.DATAPACK), delglob='*.zip', recursive=False)
     ensure_empty_dir(target_dirs.get_dir(Type.RESOURCEPACK), delglob='*.zip', recursive=False)
 
-    def apply_config(entry: ModConf):
-        nonlocal source_dir, target_dirs, build_type
+    def config_operations(entry: ModConf):
         if entry.common_conf:
-            entry.common_conf.apply(ModConfType.COMMON, source_dir, target_dirs)
+            yield from entry.common_conf.operations(ModConfType.COMMON, source_dir, target_dirs)
         if entry.client_conf and build_type.has_client:
-            entry.client_conf.apply(ModConfType.CLIENT, source_dir, target_dirs)
+            yield from entry.client_conf.operations(ModConfType.CLIENT, source_dir, target_dirs)
         if entry.server_conf and build_type.has_server:
-            entry.server_conf.apply(ModConfType.SERVER, source_dir, target_dirs)
+            yield from entry.server_conf.operations(ModConfType.SERVER, source_dir, target_dirs)
 
-    for local in resolutions.local:
+    async def copy_local(local: ModConf):
         to = os.path.join(target_dirs.get_dir(local.type), os.path.basename(local.source.path))
         if local.type in (Type.RESOURCEPACK, Type.DATAPACK) and os.path.isdir(local.source.path):
-            with ZipFile(to + '.zip', 'w') as f:
-                for path in iglob('**', root_dir=local.source.path, recursive=True):
-                    f.write(os.path.join(local.source.path, path), arcname=path)
+            await asyncio.to_thread(zip_dir, local.source.path, to + '.zip')
         else:
-            copyfile(os.path.expanduser(local.source.path), to)
-        apply_config(local)
+            await asyncio.to_thread(fastcopy, os.path.expanduser(local.source.path), to)
 
-    for resolved in resolutions.downloaded:
+    sem = asyncio.Semaphore(MAX_CONCURRENT_COPIES)
+    async def copy_downloaded(resolved):
         to = os.path.join(target_dirs.get_dir(resolved.type), resolved.ver.filename)
-        await manager.copy_file(to, resolved.source, resolved.mod, resolved.ver)
-        if resolved.is_explicit: apply_config(resolved.conf)
+        async with sem:
+            await manager.copy_file(to, resolved.source, resolved.mod, resolved.ver)
+
+    await asyncio.gather(*map(copy_local, resolutions.local),
+                         *map(copy_downloaded, resolutions.downloaded))
+
+    # Configs are applied in declaration order, as later mods may override earlier ones.
+    explicit = [r.conf for r in resolutions.downloaded if r.is_explicit]
+    apply_conf_files(chain.from_iterable(map(config_operations, chain(resolutions.local, explicit))))
 
 
 async def check(modpak: ModpakYml, build_type: BuildType|str,
@@ -53,17 +71,10 @@ async def check(modpak: ModpakYml, build_type: BuildType|str,
     build_type = modpak.get_build_type(build_type)
     target_dir = os.path.join(target_dir, build_type.name)
     target_dirs = modpak.get_target_dirs(target_dir)
-    errors = []
-    for resolved in resolutions.downloaded:
+    def verify(resolved) -> str|None:
         to = os.path.join(target_dirs.get_dir(resolved.type), resolved.ver.filename)
         h = resolved.ver.file.hash
-        with open(to, 'rb') as f: b = f.read()
-        v = h.hash(b)
-        if v != h.value:
-            errors.append(f'File {resolved.ver.filename} of {resolved.mod.name} is invalid.')
-    return errors
-
-
-
-
-
+        if h.hash_file(to) != h.value:
+            return f'File {resolved.ver.filename} of {resolved.mod.name} is invalid.'
+    errors = await asyncio.gather(*(asyncio.to_thread(verify, r) for r in resolutions.downloaded))
+    return [e for e in errors if e]
@@ -2,22 +2,52 @@ from .utils import checkabs
 from xdg import xdg_cache_home
 from typing import Callable, Iterable
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from enum import Flag
 from os import access, makedirs, unlink, R_OK
-from hashlib import sha1
+from hashlib import blake2b
 from typing import ClassVar
 import json
 import os.path
-
-def hash_path(path: str): return sha1(path.encode('utf8')).hexdigest()[0:20]
+import shutil
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+    json_dumps = partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS)
+else:
+    json_loads = json.loads
+    def json_dumps(value) -> bytes: return json.dumps(value, separators=(',', ':')).encode('utf8')
+
+# 10-byte digest keeps the 20 hex character file names of the former truncated SHA-1.
+@lru_cache(maxsize=4096)
+def hash_path(path: str): return blake2b(path.encode(), digest_size=10).hexdigest()
+
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+def write_bytes(path: str, data: bytes) -> None:
+    fd = os.open(path, WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view: view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 @dataclass(slots=True, init=False)
 class CacheFileManager:
     path: str
     realpath: str
+    prefix: str
     cache_key_mapper: Callable[[str], str]|None
+    children: dict
 
     _ROOT: ClassVar[object] = None
+    # Directories already created by this process, so child() chains skip makedirs.
+    _KNOWN_DIRS: ClassVar[set] = set()
 
     @classmethod
     def root(cls):
@@ -28,17 +58,34 @@ class CacheFileManager:
     def __init__(self, path: str, cache_key_mapper: Callable[[str], str]|None = None):
         self.path = checkabs(path)
         self.realpath = os.path.realpath(path)
+        self.prefix = os.path.join(os.path.normpath(self.path), '')
         self.cache_key_mapper = cache_key_mapper 
-        makedirs(self.path, exist_ok=True)
+        self.children = {}
+        self.ensure_dir(self.path)
+
+    @classmethod
+    def ensure_dir(cls, path: str) -> None:
+        if path in cls._KNOWN_DIRS: return
+        makedirs(path, exist_ok=True)
+        cls._KNOWN_DIRS.add(path)
+
+    @classmethod
+    def forget_dirs(cls, path: str) -> None:
+        prefix = os.path.join(path, '')
+        cls._KNOWN_DIRS = {p for p in cls._KNOWN_DIRS if p != path and not p.startswith(prefix)}
 
     @classmethod
     def hashed(cls, path: str):
         return cls(path, hash_path)
 
     def check_below_root(self, path: str) -> str:
-        if os.path.commonpath([self.realpath, os.path.realpath(path)]) != self.realpath:
+        normalized = os.path.normpath(checkabs(path))
+        # Lexical check first, resolving symlinks only when the entry itself is one.
+        if not (normalized + os.sep).startswith(self.prefix) or (
+                os.path.islink(normalized)
+                and os.path.commonpath([self.realpath, os.path.realpath(normalized)]) != self.realpath):
             raise Exception(f'Invalid cache path {path}, not below {self.realpath}')
-        return checkabs(path)
+        return path
 
     def get_cache_path(self, key: str) -> str:
         if self.cache_key_mapper:
@@ -49,26 +96,36 @@ class CacheFileManager:
     def delete_file(self, path: str) -> None:
         os.unlink(self.get_cache_path(path))
 
+    def cached_child(self, key: str, cache_key_mapper: Callable[[str], str]|None):
+        if (result := self.children.get((key, cache_key_mapper))) is None:
+            result = CacheFileManager(self.get_cache_path(key), cache_key_mapper)
+            self.children[(key, cache_key_mapper)] = result
+        return result
+
     def child(self, key: str):
-        return CacheFileManager(self.get_cache_path(key), self.cache_key_mapper)
+        return self.cached_child(key, self.cache_key_mapper)
 
     def child_unhashed(self, key: str):
-        return CacheFileManager(self.get_cache_path(key))
+        return self.cached_child(key, None)
 
     def child_hashed(self, key: str, cache_key_mapper=hash_path):
-        return CacheFileManager(self.get_cache_path(key), cache_key_mapper)
+        return self.cached_child(key, cache_key_mapper)
 
     def subdir(self, key: str) -> str:
         path = self.get_cache_path(key)
-        makedirs(path, exist_ok=True)
+        self.ensure_dir(path)
         return path
 
     def delete_subdir(self, key: str):
         path = self.get_cache_path(key)
         shutil.rmtree(path)
+        self.forget_dirs(path)
+        self.children = {k: v for k, v in self.children.items() if k[0] != key}
 
     def delete_self(self):
         shutil.rmtree(self.path)
+        self.forget_dirs(self.path)
+        self.children = {}
 
 class CacheMode(int, Flag):
     NONE = 0
@@ -76,6 +133,10 @@ class CacheMode(int, Flag):
     WRITE = 2
     FULL = 3
 
+# Set membership avoids Flag.__contains__ on every cached call.
+READ_MODES = frozenset((CacheMode.READ, CacheMode.FULL))
+WRITE_MODES = frozenset((CacheMode.WRITE, CacheMode.FULL))
+
 @dataclass(slots=True, init=False)
 class DirBackedJsonCache:
     file_cache: CacheFileManager
@@ -90,23 +151,22 @@ class DirBackedJsonCache:
         self.changed_keys = set()
 
     def get(self, key: str, default=None):
-        if (result := self.local_cache.get(key, self.SENTINEL)) is not self.SENTINEL:
-            return result
+        try: return self.local_cache[key]
+        except KeyError: pass
         path = self.file_cache.get_cache_path(key)
-        if not os.access(path, R_OK): return default
-        with open(path, 'rb') as f:
-            try:
-                result = json.load(f)
-                self.local_cache[key] = result
-                return result
-            except json.decoder.JSONDecodeError:
-                return default
+        try:
+            # Missing entries surface from open itself, with no separate access() check.
+            with open(path, 'rb', buffering=0) as f: result = json_loads(f.readall())
+        except (FileNotFoundError, PermissionError, json.decoder.JSONDecodeError):
+            return default
+        self.local_cache[key] = result
+        return result
 
     def call_cached(self, key: str, fn: Callable, *args, mode=CacheMode.FULL, **kwargs):
-        if CacheMode.READ in mode and (result := self.get(key, self.SENTINEL)) is not self.SENTINEL:
+        if mode in READ_MODES and (result := self.get(key, self.SENTINEL)) is not self.SENTINEL:
             return result
         result = fn(*args, **kwargs)
-        if CacheMode.WRITE in mode:
+        if mode in WRITE_MODES:
             self.put_persist(key, result)
         return result
 
@@ -115,10 +175,10 @@ class DirBackedJsonCache:
                                 serializer=None,
                                 deserializer=None,
                                 **kwargs):
-        if CacheMode.READ in cache_mode and (result := self.get(key, self.SENTINEL)) is not self.SENTINEL:
+        if cache_mode in READ_MODES and (result := self.get(key, self.SENTINEL)) is not self.SENTINEL:
             return deserializer(result) if deserializer else result
         result = await fn(*args, **kwargs)
-        if CacheMode.WRITE in cache_mode:
+        if cache_mode in WRITE_MODES:
             self.put_persist(key, serializer(result) if serializer else result)
         return result
 
@@ -129,13 +189,12 @@ class DirBackedJsonCache:
     def put_persist(self, key: str, value) -> None:
         self.changed_keys.discard(key)
         self.local_cache[key] = value
-        path = self.file_cache.get_cache_path(key)
-        with open(path, 'w') as f: json.dump(self.local_cache[key], f)
+        write_bytes(self.file_cache.get_cache_path(key), json_dumps(value))
 
     def persist(self) -> None:
-        for key in self.changed_keys:
-            path = self.file_cache.get_cache_path(key)
-            with open(path, 'w') as f: json.dump(self.local_cache[key], f)
+        payloads = [(self.file_cache.get_cache_path(key), json_dumps(self.local_cache[key]))
+                    for key in self.changed_keys]
+        for path, data in payloads: write_bytes(path, data)
         self.changed_keys.clear()
 
     def delete(self, key: str) -> None:
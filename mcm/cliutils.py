@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from .common import Loader, McVerMatch, SourceType, Type
 from enum import Flag
 from .serialize import deserialize
+from .utils import load_yaml
 import operator
 import yaml
 import os
@@ -17,7 +18,7 @@ class YAMLFileParamType(click.ParamType):
     def convert(self, value, param, ctx):
         if not isinstance(value, str): return value
         try:
-            with open(value, 'r') as f: return yaml.safe_load(f)
+            with open(value, 'r') as f: return load_yaml(f)
         except yaml.parser.ParserError as e:
             self.fail(f'Invalid YAML in {value}: {e}', param, ctx)
         except OSError as e:
@@ -28,15 +29,19 @@ YAML = YAMLFileParamType()
 class EnumParam(click.ParamType):
     name = 'enum'
     enum: type
+    is_flag: bool
+    members: dict
 
     def __init__(self, enum: type):
         click.ParamType.__init__(self)
         self.enum = enum
+        self.is_flag = issubclass(enum, Flag)
+        # Names take precedence over values, as with the name-then-value lookup.
+        self.members = {**{v.value: v for v in enum}, **enum.__members__}
 
     def parse_single(self, s: str):
-        if s in self.enum.__members__: return self.enum[s]
-        try: return self.enum(s)
-        except ValueError: self.fail(f'Invalid {self.enum.__name__} value {s}.')
+        if (result := self.members.get(s)) is not None: return result
+        self.fail(f'Invalid {self.enum.__name__} value {s}.')
 
     def get_metavar(self, param: click.Parameter) -> str:
         if issubclass(self.enum.__bases__[0], str):
@@ -51,7 +56,7 @@ class EnumParam(click.ParamType):
 
     def convert(self, value, param, ctx):
         if not isinstance(value, str): return value
-        if issubclass(self.enum, Flag):
+        if self.is_flag:
             return reduce(operator.or_, map(self.parse_single, value.split(',')))
         return self.parse_single(value)
 
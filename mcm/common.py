@@ -1,7 +1,7 @@
 from .utils import PrettyEnum, PrettyFlag, Styles, Syms
-from dataclasses import dataclass, replace
-from functools import partial, total_ordering
-from itertools import zip_longest
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from functools import lru_cache, partial, total_ordering
 import regex
 import os.path
 from rich.text import Text
@@ -97,21 +97,22 @@ class Source:
     @property
     def islocal(self): return self.type is SourceType.LOCAL
     def __repr__(self):
-        if self == Source.MODRINTH: return 'Source.MODRINTH'
-        if self == Source.CURSEFORGE: return 'Source.CURSEFORGE'
+        if self is Source.MODRINTH: return 'Source.MODRINTH'
+        if self is Source.CURSEFORGE: return 'Source.CURSEFORGE'
         assert self.path is not None
         return f'Source({self.type!r}, {self.path!r})'
 
     def __str__(self):
-        if self == Source.MODRINTH: return 'modrinth'
-        if self == Source.CURSEFORGE: return 'curseforge'
+        if self is Source.MODRINTH: return 'modrinth'
+        if self is Source.CURSEFORGE: return 'curseforge'
         return os.path.expanduser(self.path)
 
     def __rich__(self): return Text.styled(str(self), self.type.style)
 
-    def serialize(self) -> str: return None if self == Source.MODRINTH else str(self)
+    def serialize(self) -> str: return None if self is Source.MODRINTH else str(self)
 
     @classmethod
+    @lru_cache(maxsize=512)
     def deserialize(cls, val):
         match (val or '').lower():
             case ''|'modrinth': return Source.MODRINTH
@@ -125,16 +126,14 @@ class License:
     type: LicenseType
     name: str
     STD: ClassVar[dict]
+    STD_KEYS: ClassVar[dict]
     def __repr__(self):
-        for k,v in License.STD.items():
-            if v == self:
-                return f'License.STD[{k!r}]'
+        if (k := License.STD_KEYS.get(self)) is not None: return f'License.STD[{k!r}]'
         return f'License({self.type!r}, {self.name!r})'
     def __str__(self): return self.name
     def __rich__(self): return Text.styled(self.name, self.type.style)
     def serialize(self) -> str|list:
-        for k,v in License.STD.items():
-            if v == self: return k
+        if (k := License.STD_KEYS.get(self)) is not None: return k
         return [self.type.value, self.name]
 
     @classmethod
@@ -162,6 +161,7 @@ License.STD = dict(
 
     AGPL = License(LicenseType.DANGEROUS, 'AGPL')
 )
+License.STD_KEYS = {v: k for k, v in License.STD.items()}
 
 @total_ordering
 @dataclass(frozen=True, unsafe_hash=True, slots=True, match_args=False, repr=False)
@@ -171,9 +171,20 @@ class McVer:
     patch: int
     suffix: str = ''
     snapshot: str = ''
+    cmp: tuple = field(init=False, repr=False, compare=False, hash=False)
+    text: str = field(init=False, repr=False, compare=False, hash=False)
 
     SNAPSHOTS: ClassVar[list]
     VERSIONS: ClassVar[list]
+    VERSIONS_BY_MINOR: ClassVar[dict]
+    SNAPSHOT_IDS: ClassVar[list]
+
+    def __post_init__(self):
+        object.__setattr__(self, 'cmp', (self.major, self.minor, self.patch, self.suffix or 'release', self.snapshot or 'zzzzzz'))
+        r = f'{self.major}.{self.minor}'
+        if self.patch: r = f'{r}.{self.patch}'
+        if self.suffix: r = f'{r}-{self.suffix}'
+        object.__setattr__(self, 'text', f'{r}-{self.snapshot}' if self.snapshot else r)
 
     @property
     def type(self) -> McVerType:
@@ -188,35 +199,28 @@ class McVer:
         sn = f', {self.snapshot}' if self.snapshot else ''
         return f'McVer({self.major}, {self.minor}, {self.patch}{sn})'
 
-    def __str__(self):
-        r = f'{self.major}.{self.minor}'
-        if self.patch: r = f'{r}.{self.patch}'
-        if self.suffix: r = f'{r}-{self.suffix}'
-        return f'{r}-{self.snapshot}' if self.snapshot else r
-
-    def __rich__(self): return Text.styled(str(self), self.type.style)
+    def __str__(self): return self.text
 
-    @property
-    def cmp(self): return (self.major, self.minor, self.patch, self.suffix or 'release', self.snapshot or 'zzzzzz')
+    def __rich__(self): return Text.styled(self.text, self.type.style)
 
     def __lt__(self, other):
         if other.__class__ is not McVer: return NotImplemented
         return self.cmp < other.cmp
 
     def serialize(self) -> str:
-        if self.snapshot: return self.snapshot
-        return str(self)
+        return self.snapshot or self.text
 
     @classmethod
+    @lru_cache(maxsize=512)
     def deserialize(cls, ver: str):
         ver, _, suffix = ver.partition('-')
         if '.' in ver:
             parts = list(map(int, ver.split('.')))
             if len(parts) == 2: parts = [*parts, 0]
             return McVer(*parts, suffix)
-        for v in cls.SNAPSHOTS:
-            if v.snapshot <= ver:
-                return replace(v, snapshot=ver)
+        # SNAPSHOTS is newest first, SNAPSHOT_IDS the same ids ascending.
+        if i := bisect_right(cls.SNAPSHOT_IDS, ver):
+            return replace(cls.SNAPSHOTS[len(cls.SNAPSHOTS) - i], snapshot=ver)
         raise ValueError(f'Unknown snapshot {ver}')
 
 McVer.VERSIONS = [
@@ -230,6 +234,9 @@ McVer.VERSIONS = [
     McVer(1, 19, 0), McVer(1, 19, 1), McVer(1, 19, 2), McVer(1, 19, 3),
 ]
 
+McVer.VERSIONS_BY_MINOR = {}
+for v in McVer.VERSIONS: McVer.VERSIONS_BY_MINOR.setdefault((v.major, v.minor), []).append(v)
+
 McVer.SNAPSHOTS = [
   McVer(1, 19, 3, 'pre1', '22w42a'),
   McVer(1, 19, 1, 'pre1', '22w24a'),
@@ -252,6 +259,7 @@ McVer.SNAPSHOTS = [
   McVer(1,  9, 0, 'pre1', '15w31a'),
   McVer(1,  8, 0, 'pre1', '14w02a'),
 ]
+McVer.SNAPSHOT_IDS = [v.snapshot for v in reversed(McVer.SNAPSHOTS)]
 
 @dataclass(frozen=True, unsafe_hash=True, slots=True, match_args=False, repr=False)
 class McVerMatch:
@@ -278,7 +286,10 @@ class McVerMatch:
     def serialize(self) -> str: return str(self)
 
     @property
-    def versions(self) -> list[McVer]: return list(filter(self, McVer.VERSIONS))
+    def versions(self) -> list[McVer]:
+        if not self.ver: return list(McVer.VERSIONS)
+        # Both operators require an equal major.minor, so only that bucket can match.
+        return list(filter(self, McVer.VERSIONS_BY_MINOR.get((self.ver.major, self.ver.minor), ())))
 
     @classmethod
     def deserialize(cls, val: str):
@@ -288,23 +299,43 @@ class McVerMatch:
 
 McVerMatch.ANY = McVerMatch(None)
 
-strip_ver = partial(regex.compile(r'[ \'":,()_]+|\+?(?:forge|fabric|rift)|\.jar', regex.IGNORECASE).sub, '')
+# Input is lowercased before stripping, so the pattern needs no IGNORECASE.
+strip_ver = partial(regex.compile(r'[ \'":,()_]+|\+?(?:forge|fabric|rift)|\.jar').sub, '')
 ver_matches = regex.compile(r'[a-z_]+|\d+').findall
+
+# 'a'/'b' sort before numbers, other words after them. The end marker sorts above
+# every part, so of two versions sharing a prefix the longer one is lower.
+def ver_part_key(part: int|str) -> tuple:
+    if part.__class__ is int: return (1, part, '')
+    if part.isdecimal(): return (1, int(part), '')
+    if part == 'a' or part == 'b': return (0, 0, part)
+    return (2, 0, part)
+VER_END = (3, )
+
+@lru_cache(maxsize=4096)
+def ver_tokens(ver: str) -> tuple[str]: return tuple(ver_matches(strip_ver(ver.lower())))
+
 @total_ordering
 @dataclass(frozen=True, unsafe_hash=True, slots=True, match_args=False, repr=False)
 class Ver:
     version: tuple[int|str]
     type: VerType = VerType.RELEASE
+    cmp: tuple = field(init=False, repr=False, compare=False, hash=False)
+    text: str = field(init=False, repr=False, compare=False, hash=False)
 
-    def __str__(self):
+    def __post_init__(self):
+        object.__setattr__(self, 'cmp', (*map(ver_part_key, self.version), VER_END))
         version = '.'.join(map(str, self.version))
         match self.type:
-            case VerType.RELEASE: return version
-            case VerType.BETA: return f'{version}-BETA'
-            case VerType.ALPHA: return f'{version}-ALPHA'
+            case VerType.RELEASE: text = version
+            case VerType.BETA: text = f'{version}-BETA'
+            case VerType.ALPHA: text = f'{version}-ALPHA'
             case _: raise ValueError
+        object.__setattr__(self, 'text', text)
 
-    def __rich__(self): return Text.styled(str(self), self.type.style)
+    def __str__(self): return self.text
+
+    def __rich__(self): return Text.styled(self.text, self.type.style)
 
     def __repr__(self):
         if self.type is VerType.RELEASE: return f'Ver({self.version!r})'
@@ -312,25 +343,15 @@ class Ver:
 
     def __lt__(self, other):
         if other.__class__ is not Ver: return NotImplemented
-        for lhs, rhs in zip_longest(self.version, other.version):
-            match lhs, rhs:
-                case None, _: return False
-                case _, None: return True
-                case int(), int():
-                  if lhs < rhs: return True
-                  if lhs > rhs: return False
-                case 'a'|'b', int(): return True
-                case int(), 'a'|'b': return False
-                case _: return str(lhs) < str(rhs)
-        if self.type is VerType.RELEASE: return f'Ver({self.version!r})'
-        return f'Ver({self.version!r}, {self.type!r})'
+        return self.cmp < other.cmp
 
     @classmethod
     def parse(cls, ver: str, type: VerType|str):
         if type.__class__ is str: type = VerType.deserialize(type)
-        return Ver(tuple(ver_matches(strip_ver(ver.lower()))), type)
+        return Ver(ver_tokens(ver), type)
 
     @classmethod
+    @lru_cache(maxsize=512)
     def deserialize(cls, ver: str):
         ver, _, type = ver.partition('-')
         def maybeint(s): return int(s) if s.isnumeric() else s
@@ -338,12 +359,8 @@ class Ver:
         return cls(ver, VerType.deserialize(type))
 
     def serialize(self):
-        version = '.'.join(map(str, self.version))
-        match self.type:
-            case VerType.RELEASE: return f'{version}-RELEASE'
-            case VerType.BETA: return f'{version}-BETA'
-            case VerType.ALPHA: return f'{version}-ALPHA'
-            case _: raise ValueError
+        if self.type == VerType.RELEASE: return f'{self.text}-RELEASE'
+        return self.text
 
     
 
@@ -411,6 +428,7 @@ class VerMatch:
         return all(c(other) for c in self.criteria)
 
     @classmethod
+    @lru_cache(maxsize=512)
     def deserialize(cls, ver: str):
         if ver == '*' or ver == '': return cls.ANY
         ver, _, type = ver.partition('@')
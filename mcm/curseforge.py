@@ -3,8 +3,10 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from .common import *
 from .modinfo import *
+from functools import wraps
 from typing import ClassVar
 import asyncio
+import re
 
 LICENSE_MATCHERS = {
   'All Rights':    License.STD['Closed'],
@@ -20,16 +22,58 @@ LICENSE_MATCHERS = {
   'GNU Lesser':    License.STD['LGPL'],
   'GNU General':   License.STD['GPL'],
 }
+# Alternatives are tried in order, so earlier matchers keep their priority.
+LICENSE_RE = re.compile('|'.join(map(re.escape, LICENSE_MATCHERS)))
 def parse_license(val: str, href: str|None):
-    for k,v in LICENSE_MATCHERS.items():
-        if val.startswith(k): return v
+    if m := LICENSE_RE.match(val): return LICENSE_MATCHERS[m.group()]
     return License(LicenseType.CUSTOM, href)
 
+# Scrapes the mod page in a single WebDriver round-trip.
+MODDESC_SCRIPT = '''
+const [sidebarSel, headerSel] = arguments;
+const out = {};
+for (const row of document.querySelectorAll(sidebarSel)) {
+  const abbr = row.querySelector('abbr');
+  switch (row.children[0].innerText.trim()) {
+    case 'License': {
+      const a = row.querySelector('a');
+      out.license = [a.innerText.trim(), a.href];
+      break;
+    }
+    case 'Created': out.created = +abbr.dataset.epoch; break;
+    case 'Updated': out.updated = +abbr.dataset.epoch; break;
+  }
+}
+out.title = document.querySelector(headerSel).innerText.trim();
+out.description = document.querySelector('meta[name="twitter:description"]')?.content ?? null;
+for (const tab of ['issues', 'source', 'wiki']) {
+  out[tab] = document.querySelector(`nav > ul > li[id^="nav-${tab}"] > a`)?.href ?? null;
+}
+return out;
+'''
+MODDESC_SIDEBAR = 'aside.w-full div.flex-col.mb-3 > div.w-full.flex.justify-between'
+MODDESC_HEADER = 'header div.flex > div.flex-col.flex h2'
+
+# Checks out a browser from the pool for the duration of the call, passing it as the first argument.
+def with_browser(fn):
+    @wraps(fn)
+    async def wrapped(self, *args, **kwargs):
+        if self.pool is None: raise RuntimeError('CurseForge not entered')
+        browser = await self.pool.get()
+        try:
+            return await fn(self, browser, *args, **kwargs)
+        finally:
+            self.pool.put_nowait(browser)
+    return wrapped
+
 @dataclass(slots=True)
 class CurseForge:
-    browser: Browser
-    privacy_checked: bool
+    pool_size: int
+    browsers: list[Browser]
+    pool: asyncio.Queue|None
+    privacy_checked: set[int]
     BASE_URL: ClassVar[str] = 'https://www.curseforge.com/'
+    POOL_SIZE: ClassVar[int] = 4
 
     def modpath(self, type: Type, name: str, path: str = ''):
         if path: path = '/' + path.lstrip('/')
@@ -39,55 +83,38 @@ class CurseForge:
             case Type.SHADERPACK: return f'minecraft/customization/{name}{path}'
             case _: raise TypeError(type)
 
-    async def navigate(self, path: str):
-        self.browser.navigate(path)
-        while self.browser.title.startswith('Attention'):
-            await asyncio.sleep(0.5)
-        if not self.privacy_checked:
-            consent_frame = (await self.browser.maybe_wait("iframe[title='SP Consent Message']", timeout=10000)).maybe_one()
+    async def navigate(self, browser: Browser, path: str):
+        browser.navigate(path)
+        await browser.wait_until(lambda: not browser.title.startswith('Attention'), timeout=None)
+        if id(browser) not in self.privacy_checked:
+            consent_frame = (await browser.maybe_wait("iframe[title='SP Consent Message']", timeout=10000)).maybe_one()
             if consent_frame:
-                self.browser.select_frame(consent_frame)
-                (await self.browser.wait("button[title=Accept]")).one().click()
-                self.browser.select_frame(None)
-                await asyncio.sleep(1.5)
-            self.privacy_checked = True
-    def get_tabhref(self, name):
-        a = self.browser.find(f'nav > ul > li[id^="nav-{name}"] > a').maybe_one();
-        return None if not a else a.href
+                browser.select_frame(consent_frame)
+                (await browser.wait("button[title=Accept]")).one().click()
+                browser.select_frame(None)
+                await browser.wait_gone("iframe[title='SP Consent Message']")
+            self.privacy_checked.add(id(browser))
 
-    async def get_moddesc(self, type: Type, name: str) -> ModDesc:
-        await self.navigate(self.modpath(type, name))
-        sidebar = await self.browser.wait('aside.w-full div.flex-col.mb-3 > div.w-full.flex.justify-between')
-        header = await self.browser.wait('header div.flex > div.flex-col.flex')
+    @with_browser
+    async def get_moddesc(self, browser: Browser, type: Type, name: str) -> ModDesc:
+        await self.navigate(browser, self.modpath(type, name))
+        await browser.wait(MODDESC_SIDEBAR)
+        await browser.wait(MODDESC_HEADER)
+        d = browser.execute(MODDESC_SCRIPT, MODDESC_SIDEBAR, MODDESC_HEADER)
 
-        license = None
-        created = None
-        updated = None
-        for row in sidebar:
-            title = row.children()[0]
-            if title.text == 'License':
-                a = row.find('a').one()
-                license = parse_license(a.text, a.href)
-            elif title.text == 'Created':
-                created = datetime.fromtimestamp(int(row.find('abbr').one().attr('data-epoch')))
-            elif title.text == 'Updated':
-                updated = datetime.fromtimestamp(int(row.find('abbr').one().attr('data-epoch')))
-        return ModDesc(name, type, name, header.find('h2').one().text,
+        license = parse_license(*d['license']) if 'license' in d else None
+        created = datetime.fromtimestamp(d['created']) if 'created' in d else None
+        updated = datetime.fromtimestamp(d['updated']) if 'updated' in d else None
+        return ModDesc(name, type, name, d['title'],
             updated, created, license,
-            self.browser.meta('twitter:description'),
+            d['description'],
             None, None, None,
-            self.get_tabhref('issues'), self.get_tabhref('source'), self.get_tabhref('wiki'))
+            d['issues'], d['source'], d['wiki'])
 
-    async def get_versions(self, desc: ModDesc):
-        await self.navigate(self.modpath(desc.type, desc.name))
-        files_path = self.modpath(desc.type, desc.name, 'files')
-        file_link = await self.browser.wait(f"a[href='/{files_path}']")
-        file_link.one().click()
-        await asyncio.sleep(1.819)
-        file_link = await self.browser.wait(f"a.button[href='/{files_path}/all']")
-        file_link.one().click()
-        await asyncio.sleep(1.12)
-        rows = self.browser.find('table.listing-project-file tbody > tr')
+    @with_browser
+    async def get_versions(self, browser: Browser, desc: ModDesc):
+        await self.navigate(browser, self.modpath(desc.type, desc.name, 'files/all'))
+        rows = await browser.wait('table.listing-project-file tbody > tr')
         versions = []
         for row in rows:
             file_link = row.find("td:nth-child(2) a[data-action='file-link']").one()
@@ -108,13 +135,14 @@ class CurseForge:
                     frozenset({mcver})))
         return versions, None
 
-    async def get_version_info(self, desc: ModDesc, ver: ModVer):
-        await self.navigate(ver.id)
-        cols = await self.browser.wait('article.box.p-4.flex-col > div.flex-col.justify-between > div.flex-row.mr-2.justify-between > span.text-sm:nth-child(2)')
+    @with_browser
+    async def get_version_info(self, browser: Browser, desc: ModDesc, ver: ModVer):
+        await self.navigate(browser, ver.id)
+        cols = await browser.wait('article.box.p-4.flex-col > div.flex-col.justify-between > div.flex-row.mr-2.justify-between > span.text-sm:nth-child(2)')
         filename = cols[0].text.replace(' ', '+')
         md5 = cols[-1].text
         deps = []
-        sections = self.browser.find('section.flex-col > section.flex-col > section.flex-col.items-start')
+        sections = browser.find('section.flex-col > section.flex-col > section.flex-col.items-start')
         for section in sections:
             match section.find('h4').one().text:
                 case 'Optional Dependency': is_required = False
@@ -127,18 +155,32 @@ class CurseForge:
                 deps.append(Dep(is_required, modname))
         return ModVerInfo(ModFile(filename, None, Hash(HashType.MD5, md5), None), deps)
 
-    async def get_file(self, to: str, ver_pair: ModVerPair):
-        await self.navigate(ver_pair.id)
-        (await self.browser.wait('section > article a.button--hollow[data-tooltip="Download file"]')).one().click()
-        await self.browser.wait_download(ver_pair.filename, to, ver_pair.file.hash.check_file)
+    @with_browser
+    async def get_file(self, browser: Browser, to: str, ver_pair: ModVerPair):
+        await self.navigate(browser, ver_pair.id)
+        (await browser.wait('section > article a.button--hollow[data-tooltip="Download file"]')).one().click()
+        await browser.wait_download(ver_pair.filename, to, ver_pair.file.hash.check_file)
 
-    def __init__(self):
-        self.browser = Browser(CurseForge.BASE_URL)
-        self.privacy_checked = False
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self.browsers = []
+        self.pool = None
+        self.privacy_checked = set()
 
     async def __aenter__(self):
-        self.browser.__enter__()
+        if self.pool is not None: raise RuntimeError('CurseForge already entered')
+        # Browsers start their driver lazily, so idle pool entries cost nothing.
+        self.browsers = [Browser(CurseForge.BASE_URL) for _ in range(self.pool_size)]
+        self.pool = asyncio.Queue()
+        for browser in self.browsers:
+            browser.__enter__()
+            self.pool.put_nowait(browser)
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        self.browser.__exit__(exc_type, exc_value, traceback)
+        # Quitting a driver blocks until it exits, so the pool shuts down in parallel.
+        await asyncio.gather(*(asyncio.to_thread(browser.__exit__, exc_type, exc_value, traceback)
+                               for browser in self.browsers))
+        self.browsers = []
+        self.pool = None
+        self.privacy_checked.clear()
@@ -9,13 +9,22 @@ from .curseforge import CurseForge
 from .serialize import serialize, deserialize
 from .modinfo import ModInfo, ModVer, ModVerPair
 from os import access, makedirs, symlink, R_OK
-from shutil import copyfile
+from .utils import fastcopy
+from .cache import json_loads, json_dumps
 from functools import partialmethod
+import os
 import os.path as path
-import json
+import asyncio
+import pickle
+import sys
+import threading
 __all__ = ('ModInfoManager')
 
-CacheKey = tuple[SourceType, str]
+MAX_CONCURRENT_REQUESTS = 8
+# Bumped whenever the layout of pickled ModInfo changes, discarding older snapshots.
+SNAPSHOT_FORMAT = 2
+# Frozen slots dataclasses only unpickle from 3.11 on, so 3.10 parses the JSON every run.
+SNAPSHOT_ENABLED = sys.version_info >= (3, 11)
 
 def _path_by(self, by: str, src: SourceType, name: str):
     parent = path.join(self.dirs_by_src[src], by)
@@ -23,22 +32,34 @@ def _path_by(self, by: str, src: SourceType, name: str):
     if path.dirname(p) != parent: raise ValueError(f'Invalid name {name}')
     return p
 
-def _get_by(self, by: str, src: SourceType, id: str):
-    key = (by, src, id)
-    result = self.cache.get(key, False)
+def _read_by(p: str, snapshot: dict):
+    try: mtime = os.stat(p).st_mtime_ns
+    except OSError: return None, None
+    if (entry := snapshot.get(p)) and entry[0] == mtime: return entry
+    try:
+        with open(p, 'rb', buffering=0) as f: return mtime, deserialize(ModInfo, json_loads(f.readall()))
+    except Exception as e:
+        return None, e
+
+def _write_json(p: str, data: bytes) -> int:
+    # Written through a temporary file, so concurrent saves of one mod cannot interleave.
+    tmp = f'{p}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f: f.write(data)
+    os.replace(tmp, p)
+    return os.stat(p).st_mtime_ns
+
+async def _get_by(self, by: str, src: SourceType, id: str):
+    bucket = self.cache[by][src]
+    result = bucket.get(id, False)
     if result is False:
         p = _path_by(self, by, src, id)
-        if not access(p, R_OK):
-            result = None
-            self.cache[key] = result
+        mtime, result = await asyncio.to_thread(_read_by, p, self.snapshot)
+        if result.__class__ is ModInfo:
+            self.cache['by_id'][src][result.id] = result
+            self.cache['by_name'][src][result.name] = result
+            self.update_snapshot(p, mtime, result)
         else:
-            try:
-                result = deserialize(ModInfo, json.load(open(p, 'r')))
-                self.cache[('by_id', src, result.id)] = result
-                self.cache[('by_name', src, result.name)] = result
-            except Exception as e:
-                result = e
-                self.cache[key] = result
+            bucket[id] = result
 
     if isinstance(result, Exception):
         raise result
@@ -48,36 +69,85 @@ def _get_by(self, by: str, src: SourceType, id: str):
 class ModInfoCache:
     basedir: str
     dirs_by_src: dict[SourceType, str]
-    cache: dict[CacheKey, ModInfo|Exception]
+    # by_id/by_name -> source -> id or name -> ModInfo, None or Exception
+    cache: dict[str, dict[SourceType, dict[str, ModInfo|Exception|None]]]
     file_cache: dict[str, str]
+    # Names in files/, listed once so lookups need no per-file syscalls.
+    files_on_disk: set[str]
+    # Path -> (mtime_ns, ModInfo) of parsed cache files, kept across runs to skip JSON decoding.
+    snapshot: dict[str, tuple[int, ModInfo]]
+    # Paths read or written this run. Only these are saved, so mods no longer used drop out.
+    snapshot_used: set[str]
+    snapshot_changed: bool
 
     def __init__(self):
         self.basedir = path.join(xdg_config_home(), 'mcm')
         self.dirs_by_src = {}
-        self.cache = {}
+        self.cache = {'by_id': {}, 'by_name': {}}
         self.file_cache = {}
+        self.snapshot = self.load_snapshot()
+        self.snapshot_used = set()
+        self.snapshot_changed = False
         makedirs(path.join(self.basedir, 'files'), exist_ok=True)
+        with os.scandir(path.join(self.basedir, 'files')) as it:
+            self.files_on_disk = {e.name for e in it if e.is_file()}
         for src in SourceType:
             if src is SourceType.LOCAL: continue
             d = path.join(self.basedir, src.value)
             makedirs(path.join(d, 'by_name'), exist_ok=True)
             makedirs(path.join(d, 'by_id'), exist_ok=True)
             self.dirs_by_src[src] = d
+            self.cache['by_id'][src] = {}
+            self.cache['by_name'][src] = {}
+
+    @property
+    def snapshot_path(self): return path.join(self.basedir, 'modinfo.pickle')
+
+    def load_snapshot(self) -> dict:
+        if not SNAPSHOT_ENABLED: return {}
+        try:
+            with open(self.snapshot_path, 'rb') as f: format, snapshot = pickle.load(f)
+            return snapshot if format == SNAPSHOT_FORMAT else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f'Warning: ignoring unreadable {self.snapshot_path}: {e!r}')
+            return {}
+
+    def update_snapshot(self, p: str, mtime: int, value: ModInfo):
+        self.snapshot_used.add(p)
+        if self.snapshot.get(p) != (mtime, value):
+            self.snapshot[p] = (mtime, value)
+            self.snapshot_changed = True
+
+    def save_snapshot(self):
+        if not SNAPSHOT_ENABLED: return
+        if len(self.snapshot_used) < len(self.snapshot):
+            self.snapshot = {p: self.snapshot[p] for p in self.snapshot_used}
+            self.snapshot_changed = True
+        if not self.snapshot_changed: return
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'wb') as f: pickle.dump((SNAPSHOT_FORMAT, self.snapshot), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.snapshot_path)
+        self.snapshot_changed = False
 
     path_by_id = partialmethod(_path_by, 'by_id')
     path_by_name = partialmethod(_path_by, 'by_name')
     get_by_id = partialmethod(_get_by, 'by_id')
     get_by_name = partialmethod(_get_by, 'by_name')
         
-    def set(self, src: SourceType, value: ModInfo):
-        self.cache[('by_id', src, value.id)] = value
-        self.cache[('by_name', src, value.name)] = value
+    async def set(self, src: SourceType, value: ModInfo):
+        self.cache['by_id'][src][value.id] = value
+        self.cache['by_name'][src][value.name] = value
         path_by_id = self.path_by_id(src, value.id)
         path_by_name = self.path_by_name(src, value.name)
-        with open(path_by_id, 'w') as f:
-            json.dump(serialize(value), f)
-        if not access(path_by_name, R_OK):
-            symlink(path_by_id, path_by_name)
+        # Serialized on the event loop, as other tasks may be updating version_info.
+        mtime = await asyncio.to_thread(_write_json, path_by_id, json_dumps(serialize(value)))
+        if not await asyncio.to_thread(access, path_by_name, R_OK):
+            try: await asyncio.to_thread(symlink, path_by_id, path_by_name)
+            except FileExistsError: pass
+        self.update_snapshot(path_by_id, mtime, value)
+        self.update_snapshot(path_by_name, mtime, value)
         return value
         
     def file_path(self, filename: str):
@@ -89,12 +159,15 @@ class ModInfoCache:
     def get_file(self, filename: str):
         result = self.file_cache.get(filename, False)
         if result is False:
-            result = self.file_path(filename)
-            if not access(result, R_OK):
-                result = None
+            result = self.file_path(filename) if filename in self.files_on_disk else None
             self.file_cache[filename] = result
         return result
 
+    def add_file(self, filename: str):
+        self.files_on_disk.add(filename)
+        self.file_cache[filename] = result = self.file_path(filename)
+        return result
+
         
 @dataclass(slots=True)
 class ModInfoManager:
@@ -103,19 +176,24 @@ class ModInfoManager:
         SourceType.MODRINTH: Modrinth(),
         SourceType.CURSEFORGE: CurseForge()
     }, init=False)
+    semaphores: dict = field(default_factory=lambda: {
+        src: asyncio.Semaphore(MAX_CONCURRENT_REQUESTS) for src in (SourceType.MODRINTH, SourceType.CURSEFORGE)
+    }, init=False)
+    recheck_interval: timedelta = field(init=False)
     RECHECK_INTERVAL_MIN: ClassVar[int] = 6 * 3600
     RECHECK_INTERVAL_MAX: ClassVar[int] = 10 * 3600
 
-    def recheck_interval(self):
-        return timedelta(0, randrange(self.RECHECK_INTERVAL_MIN, self.RECHECK_INTERVAL_MAX))
+    def __post_init__(self):
+        # Drawn once per run, so every mod in a run is judged by the same threshold.
+        self.recheck_interval = timedelta(0, randrange(self.RECHECK_INTERVAL_MIN, self.RECHECK_INTERVAL_MAX))
 
     async def get_modinfo(self, source: SourceType, type: Type, id_or_name: str) -> ModInfo:
         now = datetime.now()
         desc = versions = None
         version_info = {}
         try:
-            if info := self.cache.get_by_name(source, id_or_name):
-                if now - info.checked < self.recheck_interval():
+            if info := await self.cache.get_by_name(source, id_or_name):
+                if now - info.checked < self.recheck_interval:
                     return info
                 desc = info.mod_desc
                 versions = info.versions
@@ -123,20 +201,28 @@ class ModInfoManager:
         except Exception as e:
             print(e)
             pass
-        newdesc = await self.backends[source].get_moddesc(type, id_or_name)
-        if not desc or desc.updated != newdesc.updated:
-            versions, newverinfo = await self.backends[source].get_versions(newdesc)
-            if newverinfo: version_info.update(newverinfo)
+        async with self.semaphores[source]:
+            newdesc = await self.backends[source].get_moddesc(type, id_or_name)
+            if not desc or desc.updated != newdesc.updated:
+                versions, newverinfo = await self.backends[source].get_versions(newdesc)
+                if newverinfo: version_info.update(newverinfo)
         info = ModInfo(now, newdesc, versions, version_info)
-        return self.cache.set(source, info)
+        return await self.cache.set(source, info)
+
+    async def get_modinfos(self, requests) -> list[ModInfo]:
+        return await asyncio.gather(*(self.get_modinfo(*r) for r in requests))
 
     async def get_version_info(self, source: SourceType, modinfo: ModInfo, ver: ModVer) -> ModVerPair:
         if info := modinfo.version_info.get(ver.id): return ModVerPair(ver, info)
-        info = await self.backends[source].get_version_info(modinfo.mod_desc, ver)
+        async with self.semaphores[source]:
+            info = await self.backends[source].get_version_info(modinfo.mod_desc, ver)
         modinfo.version_info[ver.id] = info
-        self.cache.set(source, modinfo)
+        await self.cache.set(source, modinfo)
         return ModVerPair(ver, info)
 
+    async def get_version_infos(self, source: SourceType, modinfo: ModInfo, vers) -> list[ModVerPair]:
+        return await asyncio.gather(*(self.get_version_info(source, modinfo, v) for v in vers))
+
     async def get_file(self, source: SourceType, modinfo: ModInfo, ver: ModVer) -> str:
         ver = await self.get_version_info(source, modinfo, ver)
         if file := self.cache.get_file(ver.filename):
@@ -144,21 +230,19 @@ class ModInfoManager:
         p = self.cache.file_path(ver.filename)
         await self.backends[source].get_file(p, ver)
         assert access(p, R_OK)
-        self.cache.file_cache[ver.filename] = p
-        return p
+        return self.cache.add_file(ver.filename)
 
     async def copy_file(self, to: str, source: SourceType, modinfo: ModInfo, ver: ModVer):
         if not path.isabs(to): raise ValueError(f'Expected absolute path')
         p = await self.get_file(source, modinfo, ver)
         assert access(p, R_OK)
-        copyfile(p, to)
+        fastcopy(p, to)
 
     async def __aenter__(self):
-        for be in self.backends.values():
-            await be.__aenter__()
+        await asyncio.gather(*(be.__aenter__() for be in self.backends.values()))
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        for be in self.backends.values():
-            await be.__aexit__(exc_type, exc_value, traceback)
+        await asyncio.gather(*(be.__aexit__(exc_type, exc_value, traceback) for be in self.backends.values()))
+        await asyncio.to_thread(self.cache.save_snapshot)
 
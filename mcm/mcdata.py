@@ -7,26 +7,44 @@ from rich import box
 from rich.columns import Columns
 from rich.table import Table
 from rich.console import Group
-from functools import partial, reduce, total_ordering
+from functools import lru_cache, partial, total_ordering
 from asyncio import Task
 from enum import Enum
 import operator
 
 SYM_FORGE = Text.styled('forge', Styles.blue_italic) + Syms.colon
 
+# Keys are immutable and heavily repeated across items and recipes, so equal keys share one instance.
+# Indexed both by normalized tuple and by the raw 'ns:loc' strings seen, which never compare equal.
+KEY_INTERN: dict[tuple|str, 'Key'] = {}
+
 @total_ordering
 class Key(tuple):
     __slots__ = ()
     def __new__(cls, *args):
-        match args:
-            case (Key() as key, ): return key
-            case ("minecraft", str() as loc): return tuple.__new__(cls, (loc, ))
-            case (str(), str()): return tuple.__new__(cls, args)
-            case (str() as key, ):
-              ns, sep, loc = key.rpartition(':')
-              if not sep or ns == 'minecraft': return tuple.__new__(cls, (loc, ))
-              return tuple.__new__(cls, (ns, loc))
-        raise TypeError(f'Invalid arguments for Key: Key{args!r}')
+        match len(args):
+            case 1:
+                arg = args[0]
+                if arg.__class__ is str:
+                    if (key := KEY_INTERN.get(arg)) is not None: return key
+                # Slow path for subclasses, which are keyed and stored as plain str.
+                elif isinstance(arg, Key): return arg
+                elif isinstance(arg, str): arg = str(arg)
+                else: raise TypeError(f'Invalid arguments for Key: Key{args!r}')
+                ns, sep, loc = arg.rpartition(':')
+                t = (loc, ) if not sep or ns == 'minecraft' else (ns, loc)
+            case 2:
+                ns, loc = args
+                if ns.__class__ is not str or loc.__class__ is not str:
+                    if not (isinstance(ns, str) and isinstance(loc, str)):
+                        raise TypeError(f'Invalid arguments for Key: Key{args!r}')
+                    ns, loc = str(ns), str(loc)
+                t = (loc, ) if ns == 'minecraft' else (ns, loc)
+            case _: raise TypeError(f'Invalid arguments for Key: Key{args!r}')
+        if (key := KEY_INTERN.get(t)) is None:
+            key = KEY_INTERN[t] = tuple.__new__(cls, t)
+        if len(args) == 1: KEY_INTERN[arg] = key
+        return key
 
     def get_namespace(self) -> str: return 'minecraft' if len(self) == 1 else self[0]
     def get_location(self) -> str: return self[-1]
@@ -47,7 +65,7 @@ class Key(tuple):
             case Key(): return self.astuple() < other.astuple()
             case str(): return self.astuple() < Key(other).astuple()
             case _: return NotImplemented
-    def __str__(self) -> str: return  f'{self[0]}:{self[1]}' if len(self) == 2 else f'minecraft:{self[0]}'
+    def __str__(self) -> str: return key_str(self)
     def __repr__(self) -> str: return  f'Key({", ".join(self)})'
     def __rich_text__(self): 
         if len(self) == 1: return Text.styled(self[0], Styles.gold_dim)
@@ -56,11 +74,18 @@ class Key(tuple):
         return Text.styled(self[0], Styles.cyan_italic) + Syms.colon + name
     def __rich__(self): return self.__rich_text__()
 
+@lru_cache(maxsize=None)
+def key_str(key: Key) -> str: return f'{key[0]}:{key[1]}' if len(key) == 2 else f'minecraft:{key[0]}'
+
 @total_ordering
 @dataclass(slots=True)
 class Tag:
     key: Key
     content: frozenset[Key]|Task|None = None
+    info: 'IngredientInfo|None' = field(default=None, repr=False)
+    key_hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self): self.key_hash = hash(self.key) + 1
     @property
     def is_resolved(self) -> bool: return isinstance(self.content, frozenset)
     def __str__(self): return f'#{self.key}'
@@ -85,7 +110,7 @@ class Tag:
             case Key(): return self.key < other
             case str(): return self.key < Key(other)
             case _: return NotImplemented
-    def __hash__(self): return hash(self.key) + 1
+    def __hash__(self): return self.key_hash
     def __contains__(self, other):
         if not self.is_resolved: raise Exception(f'Unresolved tag {self} accessed')
         match other:
@@ -96,6 +121,13 @@ class Tag:
     def __bool__(self): return bool(self.content)
     def __iter__(self): return iter(self.content)
 
+    # Shared by every ingredient referring to this tag, once its content is known.
+    def get_info(self):
+        if self.info is not None: return self.info
+        info = IngredientInfo(self.content, referenced_tags=frozenset((self, )))
+        if self.is_resolved: self.info = info
+        return info
+
 @dataclass(slots=True)
 class FoodInfo:
     fast_food: bool
@@ -163,7 +195,7 @@ class IngredientInfo:
 
 IngredientInfo.EMPTY = IngredientInfo()
 
-@dataclass
+@dataclass(slots=True)
 class Ingredient:
     cached_info: IngredientInfo|None = field(init=False, default=None)
 
@@ -192,7 +224,7 @@ class Ingredient:
                 return UnknownIngredient(o)
             case _: raise ValueError(f'Invalid ingredient {o!r}')
 
-@dataclass
+@dataclass(slots=True)
 class NilIngredient(Ingredient):
     def rich_format(self): return Syms.nullset
     def __rich__(self): return Syms.nullset
@@ -201,7 +233,7 @@ class NilIngredient(Ingredient):
 NilIngredient.INSTANCE = NilIngredient()
 
 
-@dataclass
+@dataclass(slots=True)
 class TagIngredient(Ingredient):
     tag: Tag|Key
     count: int = 1
@@ -209,28 +241,31 @@ class TagIngredient(Ingredient):
     @classmethod
     def deserialize(cls, o): return cls(Key(o['tag']), o.get('count', 1))
 
-    def rich_format(self): return Text.styled(f'#{self.tag}', Styles.orange_italic)
+    def rich_format(self):
+        if self.tag.__class__ is Tag: return self.tag.__rich__()
+        return Text.styled(f'#{self.tag}', Styles.orange_italic)
     def has_item(self, item): return item in self.tag
     def resolve(self, resolver):
         if isinstance(self.tag, Key):
             self.tag = resolver.get_tag(self.tag)
         self.tag.resolve(resolver)
     def compute_info(self):
-        return IngredientInfo(self.tag.content, referenced_tags=frozenset((self.tag, )))
+        if self.tag.__class__ is not Tag or not self.tag.is_resolved: raise Exception(f'Unresolved tag {self.rich_format().plain} accessed')
+        return self.tag.get_info()
 
 
-@dataclass
+@dataclass(slots=True)
 class UnknownIngredient(Ingredient):
     data: dict
     count: int = 1
     def rich_format(self): return Text.styled('Unknown', Styles.red_italic)
 
-    async def has_item(self, item):
+    def has_item(self, item):
         print(f'Warning: recipe custom data {self.data}')
         return False
     def compute_info(self): return IngredientInfo.EMPTY
 
-@dataclass
+@dataclass(slots=True)
 class ItemIngredient(Ingredient):
     item: Key = None
     count: int = 1
@@ -239,15 +274,24 @@ class ItemIngredient(Ingredient):
         if self.nbt:
             return self.item.__rich__() + Text.styled(self.nbt, Styles.magenta_italic)
         return self.item.__rich__()
-    async def has_item(self, item): return self.item == item
-    def compute_info(self):
-        item = frozenset((self.item, ))
-        return IngredientInfo(item, item)
+    def has_item(self, item): return self.item == item
+    def compute_info(self): return item_info(self.item)
+
+# Keys are interned, so identical item ingredients across recipes hit the same entry.
+@lru_cache(maxsize=None)
+def item_info(key: Key) -> IngredientInfo:
+    item = frozenset((key, ))
+    return IngredientInfo(item, item)
 
 get_infos = partial(map, partial(operator.methodcaller('get_info')))
-merge_infos = partial(reduce, operator.or_)
+# One union per field over all infos, rather than pairwise | building intermediate sets.
+def merge_infos(infos: list[IngredientInfo]) -> IngredientInfo:
+    if len(infos) == 1: return infos[0]
+    return IngredientInfo(frozenset().union(*(i.matched_items for i in infos)),
+                          frozenset().union(*(i.referenced_items for i in infos)),
+                          frozenset().union(*(i.referenced_tags for i in infos)))
 
-@dataclass
+@dataclass(slots=True)
 class UnionIngredient(Ingredient):
     items: list[Ingredient]
     count: int = 1
@@ -255,11 +299,7 @@ class UnionIngredient(Ingredient):
     @classmethod
     def deserialize(cls, o): return cls(list(map(Ingredient.deserialize, o)))
 
-    def has_item(self, item):
-        for ing in self.items:
-            if ing.has_item(item):
-                return True
-        return False
+    def has_item(self, item): return any(ing.has_item(item) for ing in self.items)
     def compute_info(self):
         infos = list(get_infos(self.items))
         return merge_infos(infos) if infos else IngredientInfo.EMPTY
@@ -376,17 +416,7 @@ class Recipe:
         for i in self.aux: i.resolve(resolver)
         for i in self.outputs: i.resolve(resolver)
 
-    async def has_item_as_input(self, item, tag_cb):
-        for ing in self.inputs:
-            if ing and await ing.has_item(item, tag_cb):
-                return True
-        return False
-    async def has_item_as_output(self, item, tag_cb):
-        for ing in self.outputs:
-            if ing and await ing.has_item(item, tag_cb):
-                return True
-        return False
-
-    async def has_item(self, item, tag_cb):
-        return (await self.has_item_as_input(item, tag_cb)
-                or await self.has_item_as_output(item, tag_cb))
+    # Tags must have been resolved first.
+    def has_item_as_input(self, item): return any(ing.has_item(item) for ing in self.inputs)
+    def has_item_as_output(self, item): return any(ing.has_item(item) for ing in self.outputs)
+    def has_item(self, item): return self.has_item_as_input(item) or self.has_item_as_output(item)
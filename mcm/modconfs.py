@@ -1,85 +1,111 @@
 from ast import literal_eval
 from collections.abc import Mapping, Sequence
-from dataclasses import dataclass, replace
+from copy import deepcopy
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from itertools import chain, starmap
+from operator import getitem
 import tomlkit
-from glob import iglob
-from .utils import checkabs, PrettyEnum, Styles, cpfile
+from glob import has_magic, iglob
+from .utils import checkabs, coalesce, PrettyEnum, Styles, cpfile
 import regex
 import json
 import os
 
-__all__ = ('parse_edits', 'ModConfFile', 'ModConfFileCopy', 'ModConfFileOverwrite', 'ModConfFileEdit', 'ModConfFiles')
+__all__ = ('parse_edits', 'apply_conf_files', 'ModConfFile', 'ModConfFileCopy', 'ModConfFileOverwrite', 'ModConfFileEdit', 'ModConfFiles')
 
 @dataclass(slots=True)
 class Wrapper:
     coll: dict|list
-    def maybe_child(self, key): return Cursor(self, key) if self.has_key(key) else None
-    def maybe_child_iterable(self, key): return (Cursor(self, key), ) if self.has_key(key) else ()
-    def child(self, key): return Cursor(self, key)
-    def children(self, keys = None): return map(self.child, coalesce(keys, self.keys()))
+    is_list: bool
+
+    def keys(self): return range(len(self.coll)) if self.is_list else self.coll.keys()
+    def items(self): return enumerate(self.coll) if self.is_list else self.coll.items()
+    def has_key(self, key):
+        if self.is_list: return key.__class__ is int and key >= 0 and key < len(self.coll)
+        return key in self.coll
+    def concat(self, value):
+        if not self.is_list: raise ValueError(f'Tried to concat to a dict ({self.coll!r})')
+        self.coll.extend(value)
+    def append(self, value):
+        if not self.is_list: raise ValueError(f'Tried to append to a dict ({self.coll!r})')
+        self.coll.append(value)
+    def remove_value(self, value):
+        if self.is_list: self.coll.remove(value)
+        else: del self.coll[next(k for k,v in self.coll.items() if v == value)]
+    def maybe_child(self, key): return Cursors([self.coll], [key]) if self.has_key(key) else Cursors([], [])
+    def child(self, key): return Cursors([self.coll], [key])
+    def children(self, keys = None): return Cursors.of(self.coll, coalesce(keys, self.keys()))
+
     @staticmethod
-    def create(coll: dict|list): return DictWrapper(coll) if isinstance(coll, dict) else ListWrapper(coll)
+    def create(coll: dict|list):
+        cls = coll.__class__
+        if (is_list := IS_LIST.get(cls)) is None:
+            # Subclasses, e.g. tomlkit containers, are checked once and then looked up by exact type.
+            is_list = IS_LIST[cls] = not isinstance(coll, dict)
+        return Wrapper(coll, is_list)
 
-@dataclass(slots=True)
-class DictWrapper(Wrapper):
-    def keys(self): return self.coll.keys()
-    def items(self): return self.coll.items()
-    def has_key(self, key): return key in self.coll
-    def concat(self, value): raise ValueError(f'Tried to concat to a dict ({self.coll!r})')
-    def append(self, value): raise ValueError(f'Tried to append to a dict ({self.coll!r})')
-    def remove_value(self, value): del self.coll[next(k for k,v in self.coll.items() if v == value)]
+IS_LIST = {dict: False, list: True}
 
-@dataclass(slots=True)
-class ListWrapper(Wrapper):
-    def keys(self): return range(len(self.coll))
-    def items(self): return enumerate(self.coll)
-    def has_key(self, key): return key.__class__ is int and key >= 0 and key < len(self.coll)
-    def concat(self, value): self.coll.extend(value)
-    def append(self, value): self.coll.append(value)
-    def remove_value(self, value): self.coll.remove(value)
+# Cursors into containers, as parallel lists of containers and keys within them.
+# Paths are walked without allocating per-target objects, wrapping containers only
+# when an action needs to tell dicts and lists apart.
+class Cursors:
+    __slots__ = ('colls', 'keys')
+
+    def __init__(self, colls: list, keys: list):
+        self.colls = colls
+        self.keys = keys
+
+    @staticmethod
+    def of(coll: dict|list, keys):
+        keys = list(keys)
+        return Cursors([coll] * len(keys), keys)
+
+    def __len__(self): return len(self.keys)
+    def values(self): return map(getitem, self.colls, self.keys)
+
+    def maybe_child(self, key):
+        colls = [v for v in self.values() if Wrapper.create(v).has_key(key)]
+        return Cursors(colls, [key] * len(colls))
+    def child(self, key):
+        colls = list(self.values())
+        return Cursors(colls, [key] * len(colls))
+    def children(self, keys = None):
+        colls = []
+        result_keys = []
+        for v in self.values():
+            ks = keys if keys is not None else (v.keys() if isinstance(v, dict) else range(len(v)))
+            for k in ks:
+                colls.append(v)
+                result_keys.append(k)
+        return Cursors(colls, result_keys)
 
-@dataclass(slots=True)
-class Cursor:
-    wrapper: Wrapper
-    index: object
-
-    def read(self): return self.wrapper.coll[self.index]
-    def assign(self, value): self.wrapper.coll[self.index] = value
-    def concat(self, value): self.wrap().concat(value)
-    def append(self, value): self.wrap().append(value)
-    def delete(self): del self.wrapper.coll[self.index]
-    def wrap(self): return Wrapper.create(self.read())
-    def maybe_child(self, key): return self.wrap().maybe_child(key)
-    def maybe_child_iterable(self, key): return self.wrap().maybe_child_iterable(key)
-    def child(self, key): return self.wrap().child(key)
-    def children(self, keys = None): return self.wrap().children(keys)
-    def apply(self, fn, *args): self.assign(fn(self.read, *args))
-    def remove_value(self, value): self.wrap().remove_value(value)
-
-class Cursors(list):
-    __slots__ = ()
-
-    def maybe_child(self, key): return Cursors(chain.from_iterable(c.maybe_child_iterable(key) for c in self))
-    def child(self, key): return Cursors(c.child(key) for c in self)
-    def children(self, keys = None): return Cursors(chain.from_iterable(c.children(keys) for c in self))
     def append(self, value):
-        for c in self: c.append(value)
+        for v in self.values(): Wrapper.create(v).append(value)
     def concat(self, value):
-        for c in self: c.concat(value)
+        for v in self.values(): Wrapper.create(v).concat(value)
+    # List items of each list are deleted from the highest index down, so deleting one
+    # does not shift the indices of those still to delete, whatever order they came in.
     def delete(self):
-        for c in self: c.delete()
+        by_coll = {}
+        for coll, key in zip(self.colls, self.keys):
+            if isinstance(coll, list) and key < 0: key += len(coll)
+            by_coll.setdefault(id(coll), (coll, set()))[1].add(key)
+        for coll, keys in by_coll.values():
+            for key in (sorted(keys, reverse=True) if isinstance(coll, list) else keys): del coll[key]
     def assign(self, value):
-        for c in self: c.assign(value)
+        for coll, key in zip(self.colls, self.keys): coll[key] = value
     def apply(self, fn, *args):
-        for c in self: c.apply(value, fn, *args)
+        for coll, key in zip(self.colls, self.keys): coll[key] = fn(coll[key], *args)
     def remove_value(self, value):
-        for c in self: c.remove_value(value)
+        for v in self.values(): Wrapper.create(v).remove_value(value)
 
 match_name = regex.compile('[a-zA-Z_][a-zA-Z_0-9]*').match
 match_dstr = regex.compile(r'"(?:[^\\"]+|\\.)"').match
 match_sstr = regex.compile(r"'(?:[^\\']+|\\.)'").match
 match_num = regex.compile(r'-?[0-9]+').match
+match_suffix_glob = regex.compile(r'\*(?:\.[a-zA-Z0-9]+)?').fullmatch
 
 def parse_key(path: str, at: int):
     ch = path[at]
@@ -91,36 +117,48 @@ def parse_key(path: str, at: int):
     m = match_num(path, pos=at)
     return int(m.group()), m.end()
 
-def parse_attr(value, path: str, at: int):
+# Path steps are (is_children, key or keys), keys being None for all children.
+def parse_attr(path: str, at: int):
     if path[at] == '*':
-        return value.children(), at + 1
+        return (True, None), at + 1
     key, at = parse_key(path, at)
-    return value.child(key), at
+    return (False, key), at
 
-def parse_brackets(value, path: str, at: int):
+def parse_brackets(path: str, at: int):
     if path[at] == '*':
         keys = None
         at += 1
     else:
-        at, key = parse_key(path, at)
+        key, at = parse_key(path, at)
         keys = [key]
         while path[at] == ',':
             key, at = parse_key(path, at + 1)
             keys.append(key)
+        keys = tuple(keys)
     assert(path[at] == ']')
-    return value.children(keys), at + 1
+    return (True, keys), at + 1
 
-def apply_path(value, path: str):
+# Paths are parsed once, so applying an edit to many files only walks the steps.
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> tuple[tuple[bool, object], ...]:
+    steps = []
     at = 0
     l = len(path)
     while at < l:
         if path[at] == '[':
-            value, at = parse_brackets(value, path, at + 1)
+            step, at = parse_brackets(path, at + 1)
         elif at == 0:
-            value, at = parse_attr(value, path, at)
+            step, at = parse_attr(path, at)
         else:
             assert path[at] == '.'
-            value, at = parse_attr(value, path, at + 1)
+            step, at = parse_attr(path, at + 1)
+        steps.append(step)
+    return tuple(steps)
+
+def apply_path(value, path: str|tuple):
+    if path.__class__ is str: path = compile_path(path)
+    for is_children, key in path:
+        value = value.children(key) if is_children else value.child(key)
     return value
 
 def parse_edit(path, action): return parse_path(path, parse_action(action))
@@ -139,10 +177,35 @@ class ModConfType(str, PrettyEnum):
     CLIENT = 'client' / pretty(Styles.green, 'Client conf')
     SERVER = 'server' / pretty(Styles.magenta, 'Server conf')
 
-def get_paths(source_dir: str, type: ModConfType, target_dirs, subdir: str, glob: str):
+def get_paths(source_dir: str, type: ModConfType, target_dirs, glob: str):
     target_dir = target_dirs.defaultconfig if type is ModConfType.SERVER else target_dirs.config
-    source_dir = os.path.join(source_dir, subdir, type.value)
-    return {os.path.join(target_dir, p): os.path.join(source_dir, p) for p in iglob(glob, root_dir=source_dir)}
+    return dict(find_paths(source_dir, type, target_dir, glob))
+
+# Files from config override those from defaultconfig. Missing directories and
+# literal names are handled without walking the directory. Sources do not change
+# during a run, so results are cached for the other build and conf types.
+@lru_cache(maxsize=None)
+def find_paths(source_dir: str, type: ModConfType, target_dir: str, glob: str) -> tuple[tuple[str, str], ...]:
+    magic = has_magic(glob)
+    # '*' or '*.ext' are matched by scanning, as DirEntry paths come already joined.
+    suffix = glob[1:] if magic and match_suffix_glob(glob) else None
+    target_prefix = target_dir + os.sep
+    result = {}
+    for subdir in ('defaultconfig', 'config'):
+        src_dir = os.path.join(source_dir, subdir, type.value)
+        if not os.path.isdir(src_dir): continue
+        if suffix is not None:
+            with os.scandir(src_dir) as it:
+                for e in it:
+                    # Like glob, * does not match hidden files.
+                    if e.name.endswith(suffix) and e.name[0] != '.':
+                        result[target_prefix + e.name] = e.path
+        elif magic:
+            for p in iglob(glob, root_dir=src_dir):
+                result[os.path.join(target_dir, p)] = os.path.join(src_dir, p)
+        elif os.path.lexists(src := os.path.join(src_dir, glob)):
+            result[os.path.join(target_dir, glob)] = src
+    return tuple(result.items())
 
 @dataclass(match_args=False)
 class ModConfFile:
@@ -152,12 +215,13 @@ class ModConfFile:
         return iglob(self.glob, root_dir=path)
 
     def get_paths(self, type: ModConfType, source_dir: str, target_dirs):
-        return (get_paths(source_dir, type, target_dirs, 'defaultconfig', self.glob)
-                | get_paths(source_dir, type, target_dirs, 'config', self.glob))
+        return get_paths(source_dir, type, target_dirs, self.glob)
+
+    def operations(self, type: ModConfType, source_dir: str, target_dirs):
+        return ((self, src, to) for to, src in self.get_paths(type, source_dir, target_dirs).items())
 
     def apply(self, type: ModConfType, modpak_dir: str, target_dirs):
-        for to, src in self.get_paths(type, modpak_dir, target_dirs).items():
-            self(src, to)
+        apply_conf_files(self.operations(type, modpak_dir, target_dirs))
 
 @dataclass(match_args=False)
 class ModConfFileCopy(ModConfFile):
@@ -169,14 +233,26 @@ class ModConfFileOverwrite(ModConfFile):
     def __call__(self, _, to):
         with open(to, 'w') as f: f.write(self.content)
 
+# Parsed TOML by path and stat, as tomlkit is slow and the same source is edited
+# once per conf type. Callers get a copy, since edits mutate the document.
+@lru_cache(maxsize=128)
+def parse_toml(path: str, mtime_ns: int, size: int):
+    with open(path, 'r') as f: return tomlkit.load(f)
+
 @dataclass(match_args=False)
 class ModConfFileEdit(ModConfFile):
     edits: dict
+    compiled_edits: list = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.compiled_edits = [(compile_path(path), action) for path, action in self.edits.items()]
+
     def load(self, src):
         if src.endswith('.toml'):
-            with open(src, 'r') as f: return tomlkit.load(f)
+            st = os.stat(src)
+            return deepcopy(parse_toml(src, st.st_mtime_ns, st.st_size))
         if src.endswith('.json'):
-            with open(src, 'r') as f: return json.load(f)
+            with open(src, 'rb') as f: return json.loads(f.read())
         raise ValueError(f'Unsupported extension for {src}')
     def save(self, value, dst):
         if dst.endswith('.toml'):
@@ -192,7 +268,11 @@ class ModConfFileEdit(ModConfFile):
 
     def edit(self, src):
         val = Wrapper.create(self.load(src))
-        for path, action in self.edits.items():
+        self.apply_edits(val)
+        return val.coll
+
+    def apply_edits(self, val: Wrapper):
+        for path, action in self.compiled_edits:
             target = apply_path(val, path)
             match action:
                 case { 'delete': _ }: target.delete()
@@ -201,11 +281,36 @@ class ModConfFileEdit(ModConfFile):
                 case { 'assign': value }: target.assign(value)
                 case { 'remove_value': value }: target.remove_value(value)
                 case value: target.assign(value)
-        return val.coll
 
     def __call__(self, src, to):
         self.save(self.edit(src), to)
 
+# Applies (rule, src, to) operations in order. Consecutive edits of a file from the
+# same source share one load and one save, so later edits build on earlier ones
+# instead of the pristine source. Any other operation on the file first saves the
+# pending edits, and then replaces the file as it would on its own.
+def apply_conf_files(operations):
+    by_dst = {}
+    for rule, src, to in operations: by_dst.setdefault(to, []).append((rule, src))
+    for to, rules in by_dst.items():
+        edited = edited_src = saver = None
+        for rule, src in rules:
+            if rule.__class__ is ModConfFileEdit and edited is not None and src == edited_src:
+                rule.apply_edits(edited)
+                saver = rule
+                continue
+            if edited is not None:
+                saver.save(edited.coll, to)
+                edited = None
+            if rule.__class__ is ModConfFileEdit:
+                edited = Wrapper.create(rule.load(src))
+                edited_src = src
+                rule.apply_edits(edited)
+                saver = rule
+            else:
+                rule(src, to)
+        if edited is not None: saver.save(edited.coll, to)
+
 def deserialize_filedict(l, val: dict):
     for k,v in val.items():
         match v:
@@ -232,8 +337,11 @@ class ModConfFiles:
             case _: raise ValueError(f'Unsupported ModConfig {val!r}')
         return ModConfFiles(l)
 
+    def operations(self, type: ModConfType, source_dir: str, target_dirs):
+        return chain.from_iterable(f.operations(type, source_dir, target_dirs) for f in self.files)
+
     def apply(self, type: ModConfType, source_dir: str, target_dirs):
-        for f in self.files: f.apply(type, source_dir, target_dirs)
+        apply_conf_files(self.operations(type, source_dir, target_dirs))
 
     def get_paths(self, type: ModConfType, source_dir: str, target_dirs):
         paths = {}
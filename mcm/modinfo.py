@@ -1,8 +1,8 @@
 from .common import *
 from .utils import Date, Field, Fields, Link, PrettyEnum, Styles, Subfields
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from functools import total_ordering
+from functools import lru_cache, partial, total_ordering
 from typing import ClassVar
 from rich.text import Text
 from os import access, R_OK
@@ -10,17 +10,28 @@ import hashlib
 import regex
 
 __all__ = ('Dep', 'Hash', 'HashType', 'ModDesc', 'ModFile', 'ModInfo', 'ModVer', 'ModVerInfo', 'ModVerPair', 'ModVerMatch')
+
+HASH_CHUNK_SIZE = 1 << 20
+file_digest = getattr(hashlib, 'file_digest', None)
+
 class HashType(str, PrettyEnum):
     MD5    = 'md5' / pretty(Styles.red, 'MD5')
     SHA1   = 'sha1' / pretty(Styles.red, 'SHA-1')
     SHA256 = 'sha256' / pretty(Styles.yellow, 'SHA-256')
     SHA512 = 'sha512' / pretty(Styles.green, 'SHA-512')
     
-    def get_hash(self): return hashlib.new(self.value)
+    # The named constructors are OpenSSL-backed, and thus use SHA-NI/ARMv8
+    # SHA instructions when the CPU has them.
+    def get_hash(self, data: bytes = b''): return getattr(hashlib, self.value)(data)
 
-    def hash(self, data: bytes) -> str:
-        h = self.get_hash()
-        h.update(data)
+    def hash(self, data: bytes) -> str: return self.get_hash(data).hexdigest()
+
+    def hash_file(self, p: str) -> str:
+        with open(p, 'rb', buffering=0) as f:
+            # file_digest (3.11+) hashes into a reused buffer, without allocating per chunk.
+            if file_digest is not None: return file_digest(f, self.value).hexdigest()
+            h = self.get_hash()
+            while chunk := f.read(HASH_CHUNK_SIZE): h.update(chunk)
         return h.hexdigest()
 
 @dataclass(slots=True, match_args=False, frozen=True, unsafe_hash=True)
@@ -29,7 +40,7 @@ class Hash:
     value: str
 
     def hash_file(self, p: str) -> str:
-        with open(p, 'rb') as f: return self.hash(f.read())
+        return self.type.hash_file(p)
     def hash(self, data: bytes) -> str:
         return self.type.hash(data)
     def check(self, data: bytes) -> bool:
@@ -66,19 +77,33 @@ class ModVerInfo:
 
     FIELDS = Fields(Field('Changelog', 'changelog', 'log', 'change', 'chg', 'c'), Subfields(ModFile, 'file'))
 
+has_ver = regex.compile(r'\d\.\d').search
+strip_ext = partial(regex.compile(r'\.[a-z]{3}$').sub, '')
+strip_ver_words = partial(regex.compile(r'forge|rift|fabric|alpha|beta|rc|release|pre|mc').sub, '')
+strip_leading = partial(regex.compile(r'^[a-z_.+-]+').sub, '')
+# Dashes are replaced with dots before tokenizing, so words cannot contain them.
+mcver_tokens = regex.compile(r'(?P<num>\d+)|[a-z_]+').finditer
+
 def is_ver_ok(s: str):
-    return bool(regex.search(r'\d\.\d', s))
-
-def maybe_int(s: str): return int(s) if s.isnumeric() else s
-def strip_mcver(s: str, vers):
-    s = regex.sub(r'\.[a-z]{3}$', '', s.lower())
-    def ver_base(ver): return f'{ver.major}\\.{ver.minor}'
-    for base in set(map(ver_base, vers)):
-        for r in [base + r'\.\d', base]:
-            r = r'(?<![0-9.])' + r + r'(?![0-9.])'
-            new = regex.sub(r, '', s)
+    return bool(has_ver(s))
+
+# Strippers for a Minecraft version with and without a patch number, for each major.minor seen.
+@lru_cache(maxsize=256)
+def mcver_strippers(major: int, minor: int):
+    base = f'{major}\\.{minor}'
+    return tuple(partial(regex.compile(r'(?<![0-9.])' + r + r'(?![0-9.])').sub, '')
+                 for r in (base + r'\.\d', base))
+
+# Versions are re-derived whenever ModVer.version is read, with the same inputs.
+@lru_cache(maxsize=4096)
+def strip_mcver(s: str, vers: frozenset):
+    s = strip_ext(s.lower())
+    for major, minor in {(ver.major, ver.minor) for ver in vers}:
+        for strip in mcver_strippers(major, minor):
+            new = strip(s)
             if is_ver_ok(new): s = new
-    return tuple(map(maybe_int, regex.findall(r'[a-z_-]+|\d+', regex.sub(r'^[a-z_.+-]+', '', regex.sub(r'forge|rift|fabric|alpha|beta|rc|release|pre|mc', '', s)).replace('-', '.'))))
+    return tuple(int(m.group()) if m.lastgroup else m.group()
+                 for m in mcver_tokens(strip_leading(strip_ver_words(s)).replace('-', '.')))
 
 
 @total_ordering
@@ -91,6 +116,10 @@ class ModVer:
     loaders: frozenset[Loader]
     published: datetime
     mcversions: frozenset[McVer]
+    version_string_lower: str = field(init=False, repr=False, compare=False, hash=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'version_string_lower', self.version_string.lower())
 
     @property
     def version(self):
@@ -146,22 +175,28 @@ class ModVerMatch:
     mcver: McVerMatch
     mcver_fallback: McVerMatch|None = None
     ver_str_match: str|None = None
+    ver_str_match_lower: str|None = field(init=False, repr=False, compare=False)
 
     RESULT_FAIL: ClassVar[int] = 0
     RESULT_FALLBACK: ClassVar[int] = 1
     RESULT_SUCCESS: ClassVar[int] = 2
 
+    def __post_init__(self):
+        self.ver_str_match_lower = self.ver_str_match and self.ver_str_match.lower()
+
     def test_no_fallback(self, v: ModVer): return self.test(v, fallback=False)
     def test(self, v: ModVer, *, fallback: bool = True):
-        if not self.ver(v.version): return self.RESULT_FAIL
+        # Cheapest checks first; the version is parsed from its string only for candidates.
         if self.loader and v.loaders and self.loader not in v.loaders: return self.RESULT_FAIL
-        if self.ver_str_match and self.ver_str_match.lower() not in v.version_string.lower(): return self.RESULT_FAIL
+        if self.ver_str_match_lower and self.ver_str_match_lower not in v.version_string_lower: return self.RESULT_FAIL
 
         if any(map(self.mcver, v.mcversions)):
-            return self.RESULT_SUCCESS
-        if fallback and self.mcver_fallback and any(map(self.mcver_fallback, v.mcversions)):
-            return self.RESULT_FALLBACK
-        return self.RESULT_FAIL
+            result = self.RESULT_SUCCESS
+        elif fallback and self.mcver_fallback and any(map(self.mcver_fallback, v.mcversions)):
+            result = self.RESULT_FALLBACK
+        else:
+            return self.RESULT_FAIL
+        return result if self.ver(v.version) else self.RESULT_FAIL
 
 
 @dataclass(slots=True, match_args=False)
@@ -206,6 +241,7 @@ class ModInfo:
     mod_desc: ModDesc
     versions: list[ModVer]
     version_info: dict[str, ModVerInfo]
+    versions_by_id: dict[str, ModVer] = field(init=False, repr=False, compare=False)
 
     FIELDS = Fields(Date('Checked', 'checked', 'c'), Subfields(ModDesc, 'mod_desc'))
 
@@ -235,15 +271,20 @@ class ModInfo:
     def discord_url(self) -> str|None: return self.mod_desc.discord_url
 
     def get_version(self, id: str) -> ModVer|None:
-        return next(filter(lambda v: v.id == id, self.versions), None)
+        return self.versions_by_id.get(id)
 
+    # Versions are kept sorted, so both buckets come out in order from one pass.
     def get_versions(self, mvm: ModVerMatch):
-        versions = list(filter(mvm.test_no_fallback, self.versions))
-        if not versions: versions = list(filter(mvm.test, self.versions))
-        return sorted(versions, reverse=True)
+        success, fallback = [], []
+        for v in self.versions:
+            match mvm.test(v):
+                case ModVerMatch.RESULT_SUCCESS: success.append(v)
+                case ModVerMatch.RESULT_FALLBACK: fallback.append(v)
+        return success or fallback
         # return sorted(list(filter(lambda v: (match(v.version) and any(map(mcver, v.mcversions)) and (not loader or not v.loaders or loader in v.loaders)), self.versions)), reverse=True)
 
     def get_latest_version(self, mvm: ModVerMatch): return next(iter(self.get_versions(mvm)), None)
 
     def __post_init__(self):
         self.versions.sort(reverse=True)
+        self.versions_by_id = {v.id: v for v in self.versions}
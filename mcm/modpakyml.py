@@ -1,11 +1,11 @@
 from .common import *
-from .utils import coalesce, Fields, Field, checkabs
+from .utils import coalesce, Fields, Field, checkabs, load_yaml
 from .modconfs import parse_edits, ModConfFiles, ModConfType
 from .serialize import deserialize
 from collections import UserList
 from typing import Callable
-from dataclasses import astuple, dataclass, field, replace
-from functools import partial
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 import yaml
 import os.path
 
@@ -21,10 +21,12 @@ class TargetDirs:
     config: str = 'config'
 
     @property
-    def paths(self): return astuple(self)
+    def paths(self):
+        return (self.datapacks, self.resourcepacks, self.shaderpacks, self.mods, self.defaultconfig, self.config)
 
     def resolve(self, base: str):
-        return TargetDirs(*map(partial(os.path.join, base), self.paths))
+        join = os.path.join
+        return TargetDirs(*(join(base, p) for p in self.paths))
 
     def get_dir(self, t: Type):
         match t:
@@ -135,10 +137,16 @@ class ModList(UserList):
     def with_defaults(self, default: ModConf):
         return ModList(c.with_defaults(default) for c in self)
 
+    # Walks nested groups with an explicit stack of iterators rather than nested generators.
     def _flat(self):
-        for item in self:
-            if item.__class__ is ModConf: yield item
-            else: yield from item.mods._flat()
+        stack = [iter(self.data)]
+        while stack:
+            for item in stack[-1]:
+                if item.__class__ is ModConf: yield item
+                else:
+                    stack.append(iter(item.mods.data))
+                    break
+            else: stack.pop()
 
     @property
     def flat_mods(self): return list(self._flat())
@@ -174,18 +182,28 @@ class ModpakYml:
     copy: dict[str, str]
     build_types: dict[str, BuildType]
     moddict: dict[str, ModConf] = field(init=False)
+    # The mod list is not modified after loading, so these are flattened once.
+    flat_mods: list[ModConf] = field(init=False)
+    enabled_mods: list[ModConf] = field(init=False)
+    mods_by_build_type: dict[str, list[ModConf]] = field(default_factory=dict, init=False)
+    resolved_target_dirs: dict[str, TargetDirs] = field(default_factory=dict, init=False)
 
     def __getitem__(self, key): return self.moddict[key]
     def __contains__(self, key): return key in self.moddict
     def get_build_type(self, bt: str|BuildType):
         return bt if bt.__class__ is BuildType else self.build_types[bt]
-    @property
-    def flat_mods(self): return self.mods.flat_mods
-    @property
-    def enabled_mods(self): return self.mods.enabled_mods
     def build_type_mods(self, build_type: BuildType|str):
         build_type = self.get_build_type(build_type)
-        return [m for m in self.mods.enabled_mods if m.is_enabled_for(build_type)]
+        name = build_type.name
+        if (result := self.mods_by_build_type.get(name)) is None:
+            # is_enabled_for, inlined with the build type's fields hoisted out of the loop.
+            side = build_type.side
+            result = [m for m in self.enabled_mods
+                      if m.side & side
+                      and (m.in_builds is None or name in m.in_builds)
+                      and (m.not_in_builds is None or name not in m.not_in_builds)]
+            self.mods_by_build_type[name] = result
+        return result
 
     @property
     def default_mcver_match(self): return McVerMatch(self.mc)
@@ -195,7 +213,9 @@ class ModpakYml:
     def get_target_dirs(self, base_dir: str):
         base_dir = os.path.normpath(base_dir)
         if not os.path.isabs(base_dir): raise ValueError(f'Sanity check {base_dir}')
-        return self.target_dirs.resolve(base_dir)
+        if (result := self.resolved_target_dirs.get(base_dir)) is None:
+            result = self.resolved_target_dirs[base_dir] = self.target_dirs.resolve(base_dir)
+        return result
 
     @classmethod
     def deserialize(cls, value):
@@ -211,10 +231,17 @@ class ModpakYml:
                            deserialize(TargetDirs, value['target_dirs']) if 'target_dirs' in value else None,
                            value.get('copy', {}),
                            {k: BuildType(k, deserialize(Side, v['side']), v.get('title')) for k,v in value['build_types'].items()})
+        result.flat_mods = result.mods.flat_mods
+        result.enabled_mods = [m for m in result.flat_mods if not m.disabled]
         result.moddict = {m.name: m for m in result.flat_mods}
         return result
 
+# Keyed by stat, so an edited file is parsed again.
+@lru_cache(maxsize=8)
+def load_modpak_yml(path: str, mtime_ns: int, size: int):
+    with open(path, 'rb') as f: return load_yaml(f)
+
 def parse_modpak_yml(path: str):
-    yml = yaml.safe_load(open(path, 'r'))
-    return deserialize(ModpakYml, yml)
+    st = os.stat(path)
+    return deserialize(ModpakYml, load_modpak_yml(path, st.st_mtime_ns, st.st_size))
 
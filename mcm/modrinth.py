@@ -2,32 +2,39 @@ from .backend import *
 from .common import *
 from .modinfo import *
 from .utils import print
+from .cache import CacheFileManager, DirBackedJsonCache, json_loads
+from .serialize import parse_datetime
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Any, ClassVar
 from time import time
 from aiohttp import ClientSession
-from asyncio import create_task
-from urllib.parse import quote
-from os import rename
-from dateutil.parser import isoparse
+from asyncio import create_task, gather, to_thread
+from urllib.parse import quote, urlencode
+from os import replace
 import json
 __all__ = ('Modrinth')
 
+LICENSES = {
+  'arr':          License.STD['Closed'],
+  'mpl-2':        License.STD['MPL'],
+  'mit':          License.STD['MIT'],
+  'isc':          License.STD['ISC'],
+  'bsd-2-clause': License.STD['BSD'],
+  'bsd-3-clause': License.STD['BSD'],
+  'unlicense':    License.STD['Unlicense'],
+  'zlib':         License.STD['zlib'],
+  'apache':       License.STD['Apache'],
+  'lgpl-2.1':     License.STD['LGPL'],
+  'lgpl-3':       License.STD['LGPL'],
+  'cc0':          License.STD['CC0'],
+  'gpl-2':        License.STD['GPL'],
+  'gpl-3':        License.STD['GPL'],
+}
 def parse_license(license: dict):
-    match license['id']:
-        case 'arr': return License.STD['Closed']
-        case 'mpl-2': return License.STD['MPL']
-        case 'mit': return License.STD['MIT']
-        case 'isc': return License.STD['ISC']
-        case 'bsd-2-clause'|'bsd-3-clause': return License.STD['BSD']
-        case 'unlicense': return License.STD['Unlicense']
-        case 'zlib': return License.STD['zlib']
-        case 'apache': return License.STD['Apache']
-        case 'lgpl-2.1'|'lgpl-3': return License.STD['LGPL']
-        case 'cc0': return License.STD['CC0']
-        case 'gpl-2'|'gpl-3': return License.STD['GPL']
-        case 'custom': return License(LicenseType.CUSTOM, license['url'])
-        case _: raise ValueError(f'Unknown license {license!r}')
+    if result := LICENSES.get(license['id']): return result
+    if license['id'] == 'custom': return License(LicenseType.CUSTOM, license['url'])
+    raise ValueError(f'Unknown license {license!r}')
 
 def parse_project(type: Type, project: dict):
     return ModDesc(
@@ -35,8 +42,8 @@ def parse_project(type: Type, project: dict):
         type,
         project['slug'],
         project['title'],
-        isoparse(project['updated']),
-        isoparse(project['published']),
+        parse_datetime(project['updated']),
+        parse_datetime(project['published']),
         parse_license(project['license']),
         project['description'],
         project['body'],
@@ -64,58 +71,84 @@ def parse_version(version: dict):
         VerType.deserialize(version['version_type']),
         None,
         frozenset(loaders),
-        isoparse(version['date_published']),
+        parse_datetime(version['date_published']),
         frozenset(map(McVer.deserialize, version['game_versions'])))
 
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_WRITE_SIZE = 1 << 20
+
+def query_value(v) -> str:
+    match v:
+        case str(): return v
+        case int(): return str(v)
+        case frozenset()|set()|tuple(): return json.dumps(list(v), separators=(',', ':'))
+        case _: return json.dumps(v, separators=(',', ':'))
+
 @dataclass(slots=True)
 class Modrinth:
     session: ClientSession|None = field(default=None, init=False)
+    # Files are served from a CDN rather than BASE_URL, so they get their own session.
+    download_session: ClientSession|None = field(default=None, init=False)
     active_requests: dict = field(default_factory=dict, init=False)
+    cache: DirBackedJsonCache = field(init=False)
     USER_AGENT: ClassVar[str] = 'mcm/0.0.1'
     BASE_URL: ClassVar[str] = 'https://api.modrinth.com'
     MOD_BASE_URL: ClassVar[str] = 'https://modrinth.com/mod/'
+    CATEGORIES_TTL: ClassVar[int] = 24 * 3600
 
-    async def parse_dependency(self, dep: dict):
-        if dep['project_id'] is None and dep['version_id'] is None: return None
-        project_id = dep['project_id']
-        if project_id is None:
-            json = await self.get_json(f"version/{dep['version_id']}")
-            project_id = json['project_id']
-        json = await self.get_json(f"project/{project_id}")
-        return Dep(dep['dependency_type'] == 'required', json['slug'], dep['version_id'])
+    def __post_init__(self):
+        self.cache = DirBackedJsonCache(CacheFileManager.root().child('modrinth'))
+
+    @staticmethod
+    def parse_dependency(dep: dict, projects_by_version: dict[str, str], slugs: dict[str, str]):
+        project_id = dep['project_id'] or projects_by_version.get(dep['version_id'])
+        if (slug := slugs.get(project_id)) is None: return None
+        return Dep(dep['dependency_type'] == 'required', slug, dep['version_id'])
 
     async def _get_json(self, path: str):
         async with self.session.get(path) as res:
-            return await res.json()
+            return json_loads(await res.read())
 
     async def _get_file(self, url: str, to: str):
-        async with ClientSession(headers={'User-Agent': Modrinth.USER_AGENT}) as session:
-            async with session.get(url) as res:
-                with open(to + '.part', 'wb') as f:
-                    async for c, _ in res.content.iter_chunks():
-                        f.write(c)
-        rename(to + '.part', to)
+        # Disk writes run in a thread, batched so the loop is not blocked on each chunk.
+        async with self.download_session.get(url) as res:
+            f = await to_thread(open, to + '.part', 'wb')
+            try:
+                chunks = []
+                size = 0
+                async for c in res.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    chunks.append(c)
+                    size += len(c)
+                    if size >= DOWNLOAD_WRITE_SIZE:
+                        await to_thread(f.writelines, chunks)
+                        chunks = []
+                        size = 0
+                await to_thread(f.writelines, chunks)
+            finally:
+                await to_thread(f.close)
+        await to_thread(replace, to + '.part', to)
 
     async def get_json(self, path: str, **kwargs):
-        is_first = True
-        for k, v in kwargs.items():
-            match v:
-                case None: continue
-                case str(): v = quote(v)
-                case int(): v = str(v)
-                case frozenset()|set()|tuple(): v = quote(json.dumps(list(v)))
-                case _: v = quote(json.dumps(v))
-            path += '?' if is_first else '&'
-            path += f'{k}={v}'
-            is_first = False
         path = f'/v2/{path}'
+        if params := {k: query_value(v) for k, v in kwargs.items() if v is not None}:
+            path += '?' + urlencode(params, quote_via=quote)
         if not (task := self.active_requests.get(path)):
             task = create_task(self._get_json(path))
             self.active_requests[path] = task
+            task.add_done_callback(partial(self.forget_request, path))
         return await task
 
+    # Requests are only shared while in flight, so later calls see fresh data.
+    def forget_request(self, path: str, task):
+        if self.active_requests.get(path) is task: del self.active_requests[path]
+
     async def get_categories(self, type: Type):
-        categories = await self.get_json('tag/category')
+        cached = self.cache.get('categories')
+        if cached and time() - cached['checked'] < self.CATEGORIES_TTL:
+            categories = cached['categories']
+        else:
+            categories = await self.get_json('tag/category')
+            self.cache.put_persist('categories', dict(checked=time(), categories=categories))
         type = type.value
         return {c['name']: Category(c['name']) for c in categories if c['project_type'] == type}
 
@@ -124,28 +157,29 @@ class Modrinth:
         if criteria.loader: facets.append([f'categories:{criteria.loader.value}'])
         if criteria.categories is not None: facets.append([f'categories:{c}' for c in criteria.categories])
         if criteria.mcver: facets.append([f'versions:{v}' for v in criteria.mcver.versions])
+        def get_page(offset: int):
+            return self.get_json('search', query=criteria.query, facets=facets or None,
+                                 limit=min(20, criteria.limit - offset), offset=offset, index=criteria.sort.value)
+        # The first page tells the total, after which the rest are fetched concurrently.
+        first = await get_page(0)
+        total = first['total_hits']
+        pages = [first, *await gather(*map(get_page, range(20, min(criteria.limit, total), 20)))]
         results = []
-        offset = 0
-        while True:
-            limit = min(20, criteria.limit - offset)
-            subresults = await self.get_json('search', query=criteria.query, facets=facets or None, limit=limit, offset=offset,
-                                             index=criteria.sort.value)
-            offset += 20
-            for r in subresults['hits']:
-                results.append(SearchResult(r['project_id'], r['slug'], r['downloads'], isoparse(r['date_modified']),
+        for page in pages:
+            for r in page['hits']:
+                results.append(SearchResult(r['project_id'], r['slug'], r['downloads'], parse_datetime(r['date_modified']),
                                             r['title'],
                                             r['description'], Type(r['project_type']),
                                             Modrinth.MOD_BASE_URL + r['slug']))
-            if min(criteria.limit, subresults['total_hits']) <= offset:
-                return SearchResults(results, subresults['total_hits'])
+        return SearchResults(results, total)
 
     async def get_moddesc(self, type: Type, id_or_name: str) -> ModDesc:
         return parse_project(type, await self.get_json(f'project/{id_or_name}'))
 
-    async def parse_version_info(self, version: dict, name: str):
+    def parse_version_info(self, version: dict, name: str, projects_by_version: dict[str, str], slugs: dict[str, str]):
         deps = []
         for dep in version['dependencies']:
-            dep = await self.parse_dependency(dep)
+            dep = self.parse_dependency(dep, projects_by_version, slugs)
             if dep is None:
                 print(f'WARN: Version {version["id"]} for {name} had an invaild dependency')
                 continue
@@ -155,10 +189,21 @@ class Modrinth:
 
     async def get_versions(self, desc: ModDesc):
         json = await self.get_json(f'project/{desc.id}/version')
+        # Dependencies of all versions are resolved together: versions given without a
+        # project concurrently, then every project's slug in one batch request.
+        deps = [dep for item in json for dep in item['dependencies']]
+        version_ids = list({dep['version_id'] for dep in deps if dep['project_id'] is None and dep['version_id'] is not None})
+        dep_versions = await gather(*(self.get_json(f'version/{id}') for id in version_ids))
+        projects_by_version = {id: v['project_id'] for id, v in zip(version_ids, dep_versions)}
+        project_ids = {dep['project_id'] for dep in deps if dep['project_id'] is not None}
+        project_ids.update(projects_by_version.values())
+        slugs = {p['id']: p['slug'] for p in await self.get_json('projects', ids=project_ids)} if project_ids else {}
+        versions = []
         version_info = {}
         for item in json:
-            version_info[item['id']] = await self.parse_version_info(item, desc.name)
-        return list(map(parse_version, json)), version_info
+            versions.append(parse_version(item))
+            version_info[item['id']] = self.parse_version_info(item, desc.name, projects_by_version, slugs)
+        return versions, version_info
 
     async def get_version_info(self, desc: ModDesc, ver: ModVer):
         raise ValueError('Version info not supported')
@@ -169,6 +214,7 @@ class Modrinth:
     async def __aenter__(self):
         if self.session: raise Exception('Modrinth already open')
         self.session = ClientSession(Modrinth.BASE_URL, headers={'User-Agent': Modrinth.USER_AGENT})
+        self.download_session = ClientSession(headers={'User-Agent': Modrinth.USER_AGENT})
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -178,9 +224,10 @@ class Modrinth:
         if not self.session:
             if exc_value: return
             raise Exception('Modrinth already open')
-        session = self.session
-        self.session = None
+        session, download_session = self.session, self.download_session
+        self.session = self.download_session = None
         await session.close()
+        await download_session.close()
 
     @classmethod
     def project_url(cls, name_or_id: str): return f'{cls.BASE_URL}project/{name_or_id}'
@@ -258,23 +258,19 @@ class Purkka:
             'items', self.get_all_items_uncached, cache_mode=cache_mode,
             serializer=partial(serialize_by_type, list[Item]), deserializer=partial(deserialize, list[Item]))
 
-    async def get_all_recipes(self):
-        recipes = await self.server.get_all_recipes()
-        item_reg = self.server_common.get_registry('item')
-        for r in recipes:
-            res = item_reg.get_resolver()
-            r.resolve(res)
-            await res.apply()
+    # get_info and rendering are synchronous, so the tags of recipes about to be rendered or
+    # matched are resolved here, through one resolver fetching every tag once and concurrently.
+    async def resolve_recipes(self, recipes):
+        res = self.server_common.get_registry('item').get_resolver()
+        for r in recipes: r.resolve(res)
+        await res.apply()
         return recipes
 
+    async def get_all_recipes(self):
+        return await self.resolve_recipes(await self.server.get_all_recipes())
+
     async def get_recipes_matching(self, matcher: RecipeMatcher):
-        recipes = await self.server.get_all_recipes()
-        item_reg = self.server_common.get_registry('item')
-        for r in recipes:
-            res = item_reg.get_resolver()
-            r.resolve(res)
-            await res.apply()
-        return list(filter(matcher, recipes))
+        return list(filter(matcher, await self.get_all_recipes()))
 
     async def __aenter__(self):
         if self.client_connection or self.server_connection: raise Exception('Session already open')
@@ -5,6 +5,7 @@ from .infomanager import ModInfoManager
 from .common import Source, SourceType, Loader, McVerMatch, VerMatch, Type
 from .modinfo import ModInfo, ModVerPair, ModVerMatch
 from rich.text import Text
+import asyncio
 
 __all__ = ('resolve', 'ResolveResult', 'ResolvedMod')
 
@@ -77,13 +78,18 @@ async def resolve(manager: ModInfoManager, modpak: ModpakYml, build_type: BuildT
     resolved = {}
     deps = []
     warnings = Warnings()
+    explicit = []
     for mod in modpak.build_type_mods(build_type):
         if mod.source.islocal:
             local.append(mod)
             continue
         mvm = ModVerMatch(mod.version, modpak.loader if mod.type is Type.MOD else None,
                           mod.mcver, mod.fallback_mcver, mod.match)
-        info, pair = await find_version(manager, mod.name, mod.type, mod.source.type, mvm, warnings=warnings)
+        explicit.append((mod, mvm))
+
+    found = await asyncio.gather(*(find_version(manager, mod.name, mod.type, mod.source.type, mvm, warnings=warnings)
+                                   for mod, mvm in explicit))
+    for (mod, _), (info, pair) in zip(explicit, found):
         r = ResolvedMod(info, pair, mod.source.type, mod, [])
         resolved[mod.name] = r
         for dep in pair.dependencies:
@@ -93,18 +99,23 @@ async def resolve(manager: ModInfoManager, modpak: ModpakYml, build_type: BuildT
     mcver = modpak.default_mcver_match
     mcver_fallback = modpak.default_mcver_fallback_match
     mvm = ModVerMatch(VerMatch.ANY, modpak.loader, mcver, mcver_fallback, None)
+    # Resolve dependencies a level at a time, fetching each level concurrently.
     while deps:
-        name, dependent = deps.pop()
-        if dep := resolved.get(name):
-            dep.dependents.append(dependent)
-            continue
-
-        info, pair = await find_version(manager, name, Type.MOD, dependent.source, mvm, warnings=warnings)
-        r = ResolvedMod(info, pair, dependent.source, None, [dependent])
-        resolved[name] = r
-        for dep in pair.dependencies:
-            if dep.is_required:
-                deps.append((dep.id, r))
+        pending = {}
+        for name, dependent in deps:
+            if dep := resolved.get(name):
+                dep.dependents.append(dependent)
+            else:
+                pending.setdefault(name, []).append(dependent)
+        deps = []
+        found = await asyncio.gather(*(find_version(manager, name, Type.MOD, dependents[0].source, mvm, warnings=warnings)
+                                       for name, dependents in pending.items()))
+        for (name, dependents), (info, pair) in zip(pending.items(), found):
+            r = ResolvedMod(info, pair, dependents[0].source, None, dependents)
+            resolved[name] = r
+            for dep in pair.dependencies:
+                if dep.is_required:
+                    deps.append((dep.id, r))
     return ResolveResult(list(resolved.values()), local, warnings)
 
 
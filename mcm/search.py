@@ -1,5 +1,7 @@
 import regex
+from collections import Counter
 from dataclasses import dataclass, field
+from itertools import chain
 from typing import Callable, ClassVar
 from functools import partial
 import operator
@@ -8,6 +10,41 @@ sort_key = operator.itemgetter(0)
 strip_results = partial(map, operator.itemgetter(1))
 def identity(s): return s
 
+def pattern_masks(pattern: str) -> dict[str, int]:
+    masks = {}
+    for i, ch in enumerate(pattern): masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+# Myers' bit-parallel edit distance, in the variant that lets the match start
+# anywhere in text. True if some substring of text is within max_errors edits.
+def substring_within(masks: dict[str, int], length: int, text: str, max_errors: int) -> bool:
+    if length <= max_errors: return True
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv, score = full, 0, length
+    for ch in text:
+        eq = masks.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last: score += 1
+        elif mh & last:
+            score -= 1
+            if score <= max_errors: return True
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return False
+
+# Separates fields in SearchIndex.joined. A match spanning it costs an edit,
+# so the joined row only ever over-approximates per-field matches.
+FIELD_SEP = '\0'
+
+QGRAM_LEN = 2
+def qgrams(s: str) -> set[str]: return {s[i:i + QGRAM_LEN] for i in range(len(s) - QGRAM_LEN + 1)}
+
 @dataclass(slots=True)
 class SearchIndex:
     matches: list[tuple[str, ...]] = field(init=False, default_factory=list)
@@ -15,6 +52,8 @@ class SearchIndex:
     match_transform: Callable[[str], str] = identity
     results: list = field(init=False, default_factory=list)
     max_edit_distance: int|tuple[int,int,int] = 0
+    qgram_index: dict[str, list[int]] = field(init=False, default_factory=dict)
+    joined: list[str] = field(init=False, default_factory=list)
 
     REMOVE_NONALPHA: ClassVar[Callable[[str], str]] = partial(regex.compile(r'[^a-z]').sub, '')
     REMOVE_NONALNUM: ClassVar[Callable[[str], str]] = partial(regex.compile(r'[^a-z0-9]').sub, '')
@@ -28,21 +67,41 @@ class SearchIndex:
             self.max_edit_distance = (self.max_edit_distance, self.max_edit_distance, self.max_edit_distance)
 
     def append(self, value, *texts: str):
-        self.matches.append(tuple(map(self.match_transform, map(str.lower, texts))))
+        texts = tuple(map(self.match_transform, map(str.lower, texts)))
+        row = len(self.matches)
+        for g in set().union(*map(qgrams, texts)):
+            self.qgram_index.setdefault(g, []).append(row)
+        self.matches.append(texts)
+        self.joined.append(FIELD_SEP.join(texts))
         self.results.append(value)
 
+    def candidates(self, keyword: str):
+        # q-gram lemma: each edit destroys at most QGRAM_LEN of the keyword's q-grams,
+        # so a row matching within max_errors edits must contain the rest.
+        grams = qgrams(keyword)
+        max_errors = self.max_edit_distance[2] if self.max_edit_distance else 0
+        threshold = len(grams) - max_errors * QGRAM_LEN
+        if threshold <= 0: return range(len(self.matches))
+        counts = Counter(chain.from_iterable(self.qgram_index.get(g, ()) for g in grams))
+        return sorted(row for row, count in counts.items() if count >= threshold)
+
     def search(self, keyword: str):
         keyword = self.match_transform(keyword.lower())
         if self.max_edit_distance:
             match_str = self.compile_regex(keyword).search
+            masks, max_errors = pattern_masks(keyword), self.max_edit_distance[2]
+            row_filter = lambda s: substring_within(masks, len(keyword), s, max_errors)
             max_dist = sum(self.max_edit_distance) + 1
             score_str = lambda m, s: (max_dist - sum(m.fuzzy_counts)) + (2 if m.start() == 0 else (1 if s[m.start()] == ' ' else 0)) + (3 if m.end() == len(s) else (2 if s[m.end()] == ' ' else 0))
         else:
             match_str = lambda s: keyword in s
             score_str = lambda _, s: 3 if s.startswith(keyword) else (2 if s.endswith(keyword) else 1)
+            row_filter = None
         lnm = partial(map, match_str)
         results = []
-        for i, ln in enumerate(self.matches):
+        for i in self.candidates(keyword):
+            if row_filter and not row_filter(self.joined[i]): continue
+            ln = self.matches[i]
             score = 0
             for f, b in zip(ln, self.field_boost):
                 m = match_str(f)
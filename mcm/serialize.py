@@ -8,7 +8,15 @@ from types import UnionType
 import types
 from typing import get_origin
 
-__all__ = ('deserialize', 'serialize', 'serialize_by_type')
+__all__ = ('deserialize', 'parse_datetime', 'serialize', 'serialize_by_type')
+
+# fromisoformat is implemented in C, but before 3.11 it rejects the Z suffix and
+# fractions that are not 3 or 6 digits, so those fall back to dateutil.
+def parse_datetime(s: str) -> datetime:
+    try:
+        return datetime.fromisoformat(s[:-1] + '+00:00' if s.endswith('Z') else s)
+    except ValueError:
+        return isoparse(s)
 
 def dictdiff(a: dict, b: dict) -> dict: return {k: v for k,v in a.items() if b[k] != v}
 def defaults(a): return {f.name: f.default for f in fields(a)}
@@ -58,7 +66,7 @@ def _name(name: str, fn):
     return fn
 
 def _get_parser(type, *, default: bool = False):
-    if type is datetime: return isoparse
+    if type is datetime: return parse_datetime
     if not default and hasattr(type, 'deserialize'):
         return type.deserialize
     origin = get_origin(type)
@@ -20,10 +20,14 @@ from glob import iglob
 import yaml
 import os.path
 from os import makedirs, access, R_OK, unlink
-from shutil import copyfile, rmtree
+from shutil import copyfile, rmtree, SameFileError
 from difflib import SequenceMatcher
+try:
+    from fcntl import ioctl
+except ImportError:
+    ioctl = None
 
-__all__ = ('as_props', 'as_table', 'pipes', 'commas', 'console', 'Date', 'Field', 'Fields', 'fmt', 'Link', 'PrettyEnum', 'PrettyFlag', 'print', 'spaces', 'Styles', 'Subfields', 'Syms', 'table', 'coalesce', 'parse_yaml_file', 'ensure_empty_dir', 'checkabs', 'syntax', 'syntax_diff', 'cpfile', 'rule', 'Rule')
+__all__ = ('as_props', 'as_table', 'pipes', 'commas', 'console', 'Date', 'Field', 'Fields', 'fmt', 'Link', 'PrettyEnum', 'PrettyFlag', 'print', 'spaces', 'Styles', 'Subfields', 'Syms', 'table', 'coalesce', 'parse_yaml_file', 'load_yaml', 'ensure_empty_dir', 'checkabs', 'syntax', 'syntax_diff', 'cpfile', 'fastcopy', 'linkfile', 'rule', 'Rule')
 
 console = Console(
     emoji=False,
@@ -386,15 +390,43 @@ is_not_none = partial(is_not, None)
 filter_not_none = partial(filter, is_not_none)
 def coalesce(*args): return next(filter_not_none(args), None)
 
+# The libyaml-backed loader when PyYAML was built with it, same semantics as safe_load.
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+def load_yaml(stream): return yaml.load(stream, Loader=YamlLoader)
+
 SENTINEL = object()
 def parse_yaml_file(p: str, *, default = SENTINEL):
     if default is not SENTINEL and not access(p, R_OK): return default
-    with open(p, 'r') as f: return yaml.safe_load(f)
+    with open(p, 'r') as f: return load_yaml(f)
 
 def checkabs(path: str):
     if not os.path.isabs(path): raise Exception(f'Path {path} is not absolute')
     return path
 
+FICLONE = 0x40049409
+
+# Symlinks are followed, copying the file they point to.
+def fastcopy(src: str, dst: str):
+    # Opening dst truncates it, which would wipe src if both are the same file.
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise SameFileError(f'{src!r} and {dst!r} are the same file')
+    if ioctl is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return dst
+        except OSError: pass
+    # copyfile uses sendfile on Linux when reflinks are not supported.
+    return copyfile(src, dst)
+
+def linkfile(src: str, dst: str):
+    try:
+        # link(2) does not follow symlinks on Linux, so link the target itself.
+        os.link(os.path.realpath(src), dst)
+        return dst
+    except OSError:
+        return fastcopy(src, dst)
+
 def cpfile(src: str, dst: str):
     checkabs(src)
     checkabs(dst)
@@ -402,7 +434,9 @@ def cpfile(src: str, dst: str):
     if dst.endswith('/'): raise ValueError('Path to file ends with /')
     parent = os.path.dirname(dst)
     makedirs(parent, exist_ok=True)
-    copyfile(src, dst, follow_symlinks=False)
+    # Config files are copied as they are, keeping symlinks as links.
+    if os.path.islink(src): copyfile(src, dst, follow_symlinks=False)
+    else: fastcopy(src, dst)
 
 def ensure_empty_dir(dirpath: str, *, delglob: str = '*', recursive: bool = True):
     checkabs(dirpath)
@@ -0,0 +1,31 @@
+from mcm.build import zip_dir
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile
+import os
+import unittest
+
+class ZipDirTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, *names): return os.path.join(self.dir.name, *names)
+
+    def write(self, *names):
+        os.makedirs(self.path(*names[:-1]), exist_ok=True)
+        with open(self.path(*names), 'w') as f: f.write(names[-1])
+
+    def test_zip_dir(self):
+        self.write('shared', 'textures', 'a.png')
+        self.write('pack', 'pack.mcmeta')
+        self.write('pack', '.hidden')
+        self.write('pack', '.git', 'config')
+        os.symlink(self.path('shared'), self.path('pack', 'assets'))
+        zip_dir(self.path('pack'), self.path('pack.zip'))
+        with ZipFile(self.path('pack.zip')) as f:
+            self.assertEqual(sorted(f.namelist()),
+                             ['assets/', 'assets/textures/', 'assets/textures/a.png', 'pack.mcmeta'])
+            self.assertEqual(f.read('assets/textures/a.png'), b'a.png')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+from mcm.common import Ver
+from itertools import combinations
+import unittest
+
+def ver(s): return Ver.parse(s, 'release')
+
+# From lowest to highest. Of two versions sharing a prefix the longer one is lower,
+# 'a'/'b' sort before numbers and other words after them.
+ORDERED = ['1.2.a.1', '1.2.a.3', '1.2a', '1.2b', '1.2.0', '1.2.9', '1.2.10', '1.2.alpha',
+           '1.2.beta', '1.2rc1', '1.2', '1.3', '1.10']
+
+class VerOrderTest(unittest.TestCase):
+    def test_table(self):
+        vers = list(map(ver, ORDERED))
+        for lo, hi in combinations(vers, 2):
+            with self.subTest(lo=lo.version, hi=hi.version):
+                self.assertLess(lo, hi)
+                self.assertFalse(hi < lo)
+        self.assertEqual(sorted(reversed(vers)), vers)
+
+    def test_equal_versions_are_not_less(self):
+        self.assertFalse(ver('1.2.3') < ver('1.2.3'))
+        self.assertFalse(Ver((1, 2)) < Ver((1, 2)))
+
+    def test_parsed_and_deserialized_parts_compare_by_value(self):
+        self.assertFalse(ver('1.2.10') < Ver((1, 2, 10)))
+        self.assertFalse(Ver((1, 2, 10)) < ver('1.2.10'))
+        self.assertLess(Ver((1, 2, 9)), ver('1.2.10'))
+
+    # Cases that order differently from the comparison before the precomputed key. Numeric
+    # strings from Ver.parse compared as text, an equal string part ended the comparison,
+    # and two words compared as text, where 'a'/'b' now rank before other words.
+    def test_changed_from_baseline(self):
+        for lo, hi in [('1.2.9', '1.2.10'), ('1.2', '1.3'), ('1.9', '1.10'),
+                       ('mc1.19-2', 'mc1.19-10'), ('1.2.a.1', '1.2.a.3'),
+                       ('1.2.alpha', '1.2.beta'), ('1.2a', '1.2b'), ('1.2b', '1.2.alpha'),
+                       ('1.2rc1', '1.2')]:
+            with self.subTest(lo=lo, hi=hi):
+                self.assertLess(ver(lo), ver(hi))
+                self.assertFalse(ver(hi) < ver(lo))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+from mcm.infomanager import ModInfoCache, SNAPSHOT_ENABLED
+from tempfile import TemporaryDirectory
+from unittest import mock
+import os
+import unittest
+
+@unittest.skipUnless(SNAPSHOT_ENABLED, 'ModInfo snapshots need Python 3.11')
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        patcher = mock.patch.dict(os.environ, {'XDG_CONFIG_HOME': self.dir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unused_entries_are_pruned(self):
+        cache = ModInfoCache()
+        cache.update_snapshot('/a.json', 1, 'a')
+        cache.update_snapshot('/b.json', 1, 'b')
+        cache.save_snapshot()
+        self.assertEqual(ModInfoCache().snapshot, {'/a.json': (1, 'a'), '/b.json': (1, 'b')})
+
+        cache = ModInfoCache()
+        cache.update_snapshot('/a.json', 1, 'a')
+        cache.save_snapshot()
+        self.assertEqual(ModInfoCache().snapshot, {'/a.json': (1, 'a')})
+
+    def test_unreadable_snapshot_is_reported(self):
+        cache = ModInfoCache()
+        with open(cache.snapshot_path, 'wb') as f: f.write(b'garbage')
+        with mock.patch('builtins.print') as print:
+            self.assertEqual(ModInfoCache().snapshot, {})
+        print.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+from mcm.mcdata import Key
+import unittest
+
+class Name(str): pass
+
+class KeyTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(tuple(Key('minecraft:stick')), ('stick', ))
+        self.assertEqual(tuple(Key('stick')), ('stick', ))
+        self.assertEqual(tuple(Key('forge:ingots/iron')), ('forge', 'ingots/iron'))
+        self.assertEqual(tuple(Key('forge', 'ingots')), ('forge', 'ingots'))
+        self.assertEqual(tuple(Key('minecraft', 'stick')), ('stick', ))
+
+    def test_interned(self):
+        self.assertIs(Key('minecraft:stick'), Key('stick'))
+        self.assertIs(Key('forge', 'ingots'), Key('forge:ingots'))
+        self.assertIs(Key(Key('stick')), Key('stick'))
+
+    def test_str_subclasses(self):
+        self.assertIs(Key(Name('forge:ingots')), Key('forge:ingots'))
+        self.assertIs(Key(Name('forge'), Name('ingots')), Key('forge:ingots'))
+        self.assertIs(type(Key(Name('forge:nuggets'))[0]), str)
+
+    def test_invalid(self):
+        self.assertRaises(TypeError, Key, 1)
+        self.assertRaises(TypeError, Key, 'a', 1)
+        self.assertRaises(TypeError, Key, 'a', 'b', 'c')
+
+if __name__ == '__main__':
+    unittest.main()
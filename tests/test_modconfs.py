@@ -0,0 +1,77 @@
+from mcm.modconfs import apply_conf_files, Cursors, ModConfFileCopy, ModConfFileEdit, Wrapper
+from tempfile import TemporaryDirectory
+import json
+import os
+import unittest
+
+class ApplyConfFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.dst = self.path('out.json')
+
+    def path(self, name): return os.path.join(self.dir.name, name)
+
+    def source(self, name, value):
+        p = self.path(name)
+        with open(p, 'w') as f: json.dump(value, f)
+        return p
+
+    def result(self):
+        with open(self.dst) as f: return json.load(f)
+
+    def test_edits_of_one_source_are_merged(self):
+        src = self.source('common.json', {'a': 1, 'b': 1})
+        apply_conf_files([(ModConfFileEdit('*.json', {'a': 2}), src, self.dst),
+                          (ModConfFileEdit('*.json', {'b': 3}), src, self.dst)])
+        self.assertEqual(self.result(), {'a': 2, 'b': 3})
+
+    def test_edit_of_another_source_starts_from_that_source(self):
+        common = self.source('common.json', {'a': 1, 'b': 1})
+        client = self.source('client.json', {'a': 10, 'b': 10})
+        apply_conf_files([(ModConfFileEdit('*.json', {'a': 2}), common, self.dst),
+                          (ModConfFileEdit('*.json', {'b': 3}), client, self.dst)])
+        self.assertEqual(self.result(), {'a': 10, 'b': 3})
+
+    def test_copy_after_edit_replaces_the_file(self):
+        common = self.source('common.json', {'a': 1})
+        copied = self.source('copied.json', {'c': 1})
+        apply_conf_files([(ModConfFileEdit('*.json', {'a': 2}), common, self.dst),
+                          (ModConfFileCopy('*.json'), copied, self.dst)])
+        self.assertEqual(self.result(), {'c': 1})
+
+    def test_edit_after_copy_starts_from_its_source(self):
+        common = self.source('common.json', {'a': 1})
+        copied = self.source('copied.json', {'c': 1})
+        apply_conf_files([(ModConfFileCopy('*.json'), copied, self.dst),
+                          (ModConfFileEdit('*.json', {'a': 2}), common, self.dst)])
+        self.assertEqual(self.result(), {'a': 2})
+
+    def test_last_source_decides_the_base(self):
+        common = self.source('common.json', {'a': 1, 'b': 1})
+        client = self.source('client.json', {'a': 10, 'b': 10})
+        apply_conf_files([(ModConfFileEdit('*.json', {'a': 2}), common, self.dst),
+                          (ModConfFileEdit('*.json', {'b': 3}), client, self.dst),
+                          (ModConfFileEdit('*.json', {'b': 4}), common, self.dst)])
+        self.assertEqual(self.result(), {'a': 1, 'b': 4})
+
+class DeleteTest(unittest.TestCase):
+    def edit(self, value, edits):
+        val = Wrapper.create(value)
+        ModConfFileEdit('*.json', edits).apply_edits(val)
+        return val.coll
+
+    def test_delete_indices_in_any_order(self):
+        self.assertEqual(self.edit({'l': [0, 1, 2, 3]}, {'l[2,0]': {'delete': True}}), {'l': [1, 3]})
+        self.assertEqual(self.edit({'l': [0, 1, 2, 3]}, {'l[0,2]': {'delete': True}}), {'l': [1, 3]})
+
+    def test_delete_negative_and_repeated_indices(self):
+        self.assertEqual(self.edit({'l': [0, 1, 2, 3]}, {'l[-1,0,3]': {'delete': True}}), {'l': [1, 2]})
+
+    def test_delete_across_lists(self):
+        value = [[0, 1, 2], [3, 4, 5]]
+        Cursors([value[1], value[0], value[1]], [0, 2, 2]).delete()
+        self.assertEqual(value, [[0, 1], [4]])
+
+if __name__ == '__main__':
+    unittest.main()
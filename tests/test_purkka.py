@@ -0,0 +1,52 @@
+from mcm.mcdata import Key, Tag
+from mcm.purkka import Purkka, PurkkaCommonClient, PurkkaServerClient
+from rich.console import Console
+import asyncio
+import unittest
+
+RECIPE_TYPES = {'minecraft:crafting_shapeless': {
+    'name': 'Shapeless',
+    'inputs': [{'name': 'Input', 'type': 'rest', 'start': 0}],
+    'outputs': [{'name': 'Output', 'type': 'single', 'start': 0}]}}
+RECIPES = [{'type': 'minecraft:crafting_shapeless', 'id': 'minecraft:iron_bars', 'special': False,
+            'inputs': [{'tag': 'forge:ingots/iron'}, {'item': 'minecraft:stick'}],
+            'outputs': [{'item': 'minecraft:iron_bars', 'count': 16}]}]
+
+class FakeConnection:
+    def __init__(self): self.tag_requests = []
+    async def get_json(self, path): return RECIPE_TYPES if path == '/recipe-types' else RECIPES
+    async def get_tag_contents(self, registry, tag):
+        self.tag_requests.append(tag)
+        return [Key('minecraft:iron_ingot')]
+
+def render(value):
+    console = Console(width=80, color_system=None)
+    with console.capture() as capture: console.print(value)
+    return capture.get()
+
+class RecipeTest(unittest.TestCase):
+    def get_all_recipes(self):
+        self.connection = FakeConnection()
+        purkka = Purkka(None, None)
+        purkka.server = PurkkaServerClient(self.connection)
+        purkka.server_common = PurkkaCommonClient(self.connection)
+        return asyncio.run(purkka.get_all_recipes())
+
+    def test_rendered_tags_are_resolved(self):
+        recipe, = self.get_all_recipes()
+        tag = recipe.inputs[0].tag
+        self.assertIs(tag.__class__, Tag)
+        self.assertTrue(tag.is_resolved)
+        self.assertEqual(self.connection.tag_requests, ['forge:ingots/iron'])
+        rendered = render(recipe)
+        self.assertIn('#forge:ingots/iron, stick', rendered)
+        self.assertNotIn('##', rendered)
+
+    def test_info_lists_tag_items(self):
+        recipe, = self.get_all_recipes()
+        info = recipe.get_info()
+        self.assertIn(Key('minecraft:iron_ingot'), info.inputs[0].matched_items)
+        self.assertIn(Key('minecraft:stick'), info.inputs[1].matched_items)
+
+if __name__ == '__main__':
+    unittest.main()
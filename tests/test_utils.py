@@ -0,0 +1,46 @@
+from mcm.utils import cpfile, fastcopy, linkfile
+from shutil import SameFileError
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+class CopyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.target = self.path('target.jar')
+        with open(self.target, 'wb') as f: f.write(b'mod')
+        self.link = self.path('link.jar')
+        os.symlink(self.target, self.link)
+
+    def path(self, name): return os.path.join(self.dir.name, name)
+
+    def assert_copied(self, dst):
+        self.assertFalse(os.path.islink(dst))
+        with open(dst, 'rb') as f: self.assertEqual(f.read(), b'mod')
+
+    def test_fastcopy_follows_symlinks(self):
+        dst = self.path('copy.jar')
+        fastcopy(self.link, dst)
+        self.assert_copied(dst)
+
+    def test_fastcopy_refuses_the_same_file(self):
+        hardlink = self.path('hardlink.jar')
+        os.link(self.target, hardlink)
+        for dst in (self.target, self.link, hardlink):
+            with self.subTest(dst=dst):
+                self.assertRaises(SameFileError, fastcopy, self.target, dst)
+        with open(self.target, 'rb') as f: self.assertEqual(f.read(), b'mod')
+
+    def test_linkfile_follows_symlinks(self):
+        dst = self.path('hardlink.jar')
+        linkfile(self.link, dst)
+        self.assert_copied(dst)
+
+    def test_cpfile_keeps_symlinks(self):
+        dst = self.path('sub/copy.jar')
+        cpfile(self.link, dst)
+        self.assertEqual(os.readlink(dst), self.target)
+
+if __name__ == '__main__':
+    unittest.main()